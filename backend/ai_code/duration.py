@@ -0,0 +1,147 @@
+# backend/ai_code/duration.py
+
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict
+
+from sqlalchemy import case
+from sqlmodel import Session, select, func
+
+from models import Quiz, Question, QuizResult
+
+# ⚙️ Estimator settings (override via environment)
+REFIT_INTERVAL_SECONDS = int(os.getenv("DURATION_REFIT_INTERVAL_SECONDS", 6 * 3600))
+MIN_RESULTS_PER_QUIZ = 3     # quizzes with fewer attempts are too noisy to learn from
+MIN_QUIZZES_PER_LEVEL = 5    # below this the default multiplier is kept
+TARGET_PERCENTILE = 0.9      # give enough time for ~90% of students to finish
+MAX_TRAINING_QUIZZES = 500
+
+# Baseline: ~1000 characters read per minute plus thinking time per question
+READ_CHARS_PER_MINUTE = 1000
+THINK_MINUTES_PER_QUESTION = 0.5
+MIN_MINUTES, MAX_MINUTES = 1, 180
+
+DEFAULT_MULTIPLIERS = {"easy": 0.8, "medium": 1.0, "hard": 1.4}
+
+# Current calibration; replaced wholesale by refit_from_history()
+model = {
+    "multipliers": dict(DEFAULT_MULTIPLIERS),
+    "fitted_at": None,
+    "samples": {},
+}
+
+
+def base_minutes(num_questions: int, text_chars: int) -> float:
+    return num_questions * THINK_MINUTES_PER_QUESTION + text_chars / READ_CHARS_PER_MINUTE
+
+
+def question_chars(q: dict) -> int:
+    return len(str(q.get("question", ""))) + sum(len(str(o)) for o in q.get("options", []))
+
+
+def estimate_duration(questions: list, difficulty: str) -> int:
+    """
+    Suggest a quiz duration in whole minutes from question text length
+    and difficulty, using the latest calibrated multiplier.
+    """
+    chars = sum(question_chars(q) for q in questions if isinstance(q, dict))
+    multiplier = model["multipliers"].get(difficulty.lower(), DEFAULT_MULTIPLIERS["medium"])
+    minutes = math.ceil(base_minutes(len(questions), chars) * multiplier)
+    return max(MIN_MINUTES, min(MAX_MINUTES, minutes))
+
+
+def refit_from_history(session: Session) -> dict:
+    """
+    Fit one multiplier per difficulty so that the baseline matches the
+    TARGET_PERCENTILE of observed QuizResult.time_taken (least squares
+    through the origin). Levels without enough data keep their default.
+
+    Percentiles are picked in SQL, so only one row per training quiz is
+    loaded however many results have accumulated.
+    """
+    recent_quizzes = (
+        select(Quiz.quiz_id, Quiz.difficulty)
+        .order_by(Quiz.created_at.desc())
+        .limit(MAX_TRAINING_QUIZZES)
+        .subquery()
+    )
+
+    text_stats = session.exec(
+        select(
+            Question.quiz_id,
+            func.count(Question.id),
+            func.sum(
+                func.length(Question.question_text) + func.length(Question.option_a)
+                + func.length(Question.option_b) + func.length(Question.option_c)
+                + func.length(Question.option_d)
+            ),
+        )
+        .join(recent_quizzes, recent_quizzes.c.quiz_id == Question.quiz_id)
+        .group_by(Question.quiz_id)
+    ).all()
+
+    # Rank each quiz's times; the 1-based position of the percentile is
+    # min(n, floor(n * p) + 1), kept in integer arithmetic for every dialect
+    ranked = (
+        select(
+            QuizResult.quiz_id,
+            recent_quizzes.c.difficulty,
+            QuizResult.time_taken,
+            func.row_number().over(partition_by=QuizResult.quiz_id, order_by=QuizResult.time_taken).label("position"),
+            func.count().over(partition_by=QuizResult.quiz_id).label("attempts"),
+        )
+        .join(recent_quizzes, recent_quizzes.c.quiz_id == QuizResult.quiz_id)
+        .subquery()
+    )
+    target = ranked.c.attempts * round(TARGET_PERCENTILE * 100) // 100 + 1
+    percentile_times = {
+        quiz_id: (difficulty, time_taken)
+        for quiz_id, difficulty, time_taken in session.exec(
+            select(ranked.c.quiz_id, ranked.c.difficulty, ranked.c.time_taken)
+            .where(ranked.c.attempts >= MIN_RESULTS_PER_QUIZ)
+            .where(ranked.c.position == case((target > ranked.c.attempts, ranked.c.attempts), else_=target))
+        ).all()
+    }
+
+    # Accumulate sum(x*y) and sum(x*x) per difficulty
+    sums = defaultdict(lambda: [0.0, 0.0, 0])
+    for quiz_id, num_questions, chars in text_stats:
+        if quiz_id not in percentile_times:
+            continue
+        difficulty, y = percentile_times[quiz_id]
+        difficulty = (difficulty or "medium").lower()
+        x = base_minutes(num_questions, chars or 0)
+        acc = sums[difficulty]
+        acc[0] += x * y
+        acc[1] += x * x
+        acc[2] += 1
+
+    multipliers = dict(DEFAULT_MULTIPLIERS)
+    for difficulty, (xy, xx, n) in sums.items():
+        if n >= MIN_QUIZZES_PER_LEVEL and xx > 0:
+            multipliers[difficulty] = round(xy / xx, 3)
+
+    model.update(
+        multipliers=multipliers,
+        fitted_at=time.time(),
+        samples={d: acc[2] for d, acc in sums.items()},
+    )
+    return model
+
+
+async def run_periodic_refit(engine, interval: int = REFIT_INTERVAL_SECONDS):
+    """
+    Background loop started by the app lifespan; refits off the event loop.
+    """
+    def refit():
+        with Session(engine) as session:
+            refit_from_history(session)
+
+    while True:
+        try:
+            await asyncio.to_thread(refit)
+        except Exception as e:
+            print(f"⚠️ Duration model refit failed: {e}")
+        await asyncio.sleep(interval)
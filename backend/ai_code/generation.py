@@ -0,0 +1,140 @@
+# backend/ai_code/generation.py
+
+import asyncio
+import json
+import math
+import os
+import re
+from typing import Awaitable, Callable, List
+
+from ai_code.quiz_store import validate_questions
+
+# ⚙️ Map-reduce settings (override via environment)
+CHUNK_TOKENS = int(os.getenv("QUIZ_CHUNK_TOKENS", 1500))
+MAX_CHUNKS = int(os.getenv("QUIZ_MAX_CHUNKS", 8))
+LLM_CONCURRENCY = int(os.getenv("QUIZ_LLM_CONCURRENCY", 4))
+MAX_SOURCE_PAGES = int(os.getenv("QUIZ_MAX_SOURCE_PAGES", 1000))  # longer ranges are sampled evenly
+CHARS_PER_TOKEN = 4  # rough estimate, good enough for prompt sizing
+
+# An async callable that sends a prompt and returns the model's text reply
+Completer = Callable[[str], Awaitable[str]]
+
+
+def chunk_text(text: str, max_tokens: int = CHUNK_TOKENS) -> List[str]:
+    """
+    Split text on word boundaries into sections of at most ~max_tokens.
+    """
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    chunks = []
+    current = []
+    size = 0
+    for word in text.split():
+        if current and size + len(word) + 1 > max_chars:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        current.append(word)
+        size += len(word) + 1
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def select_chunks(chunks: List[str], num_questions: int, max_chunks: int = MAX_CHUNKS) -> List[str]:
+    """
+    Pick evenly spaced sections so questions cover the whole document
+    without making more LLM calls than there are questions to ask.
+    Each pick is the middle of its stretch, so the end of the document
+    is covered as well as the start.
+    """
+    limit = max(1, min(len(chunks), num_questions, max_chunks))
+    if len(chunks) <= limit:
+        return chunks
+    step = len(chunks) / limit
+    return [chunks[int((i + 0.5) * step)] for i in range(limit)]
+
+
+def build_prompt(text: str, num_questions: int, difficulty: str) -> str:
+    return f"""
+You are an educational quiz generation assistant. Based on the text provided, generate {num_questions} multiple-choice questions (MCQs) of {difficulty} difficulty level. Each question must:
+- Be relevant to the provided text.
+- Contain 4 answer options labeled A, B, C, and D.
+- Include a `correct_option` field (0 for A, 1 for B, etc.).
+Return the output as a pure JSON array of objects with:
+- `question`: string
+- `options`: list of 4 strings
+- `correct_option`: integer
+
+Here is the text:
+{text}
+"""
+
+
+def parse_questions(content: str) -> list:
+    """
+    Pull the JSON array of questions out of an LLM reply.
+    """
+    match = re.search(r"\[.*\]", content, re.DOTALL)
+    if not match:
+        raise ValueError("LLM response does not contain a JSON array.")
+    return json.loads(match.group(0))
+
+
+def _interleave(batches: List[list]):
+    longest = max((len(b) for b in batches), default=0)
+    for i in range(longest):
+        yield [b[i] for b in batches if i < len(b)]
+
+
+def merge_questions(batches: List[list], num_questions: int) -> list:
+    """
+    Interleave per-section results (so every section is represented),
+    drop duplicate question texts and trim to num_questions.
+    """
+    merged = []
+    seen = set()
+    for round_items in _interleave(batches):
+        for q in round_items:
+            key = q["question"].strip().lower()
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(q)
+    return merged[:num_questions]
+
+
+async def generate_questions(
+    text: str,
+    num_questions: int,
+    difficulty: str,
+    complete: Completer,
+    concurrency: int = LLM_CONCURRENCY,
+) -> list:
+    """
+    Map: ask for questions from each selected section concurrently.
+    Reduce: merge, de-duplicate and trim to num_questions.
+    Malformed items are dropped per section, before trimming.
+
+    A failing section is dropped; the call only fails if every section fails.
+    """
+    sections = select_chunks(chunk_text(text), num_questions)
+    if not sections:
+        raise ValueError("No text could be extracted from the document.")
+
+    # Ask each section for a slightly larger share so trimming can absorb bad items
+    per_section = math.ceil(num_questions / len(sections))
+    if len(sections) > 1:
+        per_section += 1
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_section(section: str) -> list:
+        async with semaphore:
+            content = await complete(build_prompt(section, per_section, difficulty))
+        return validate_questions(parse_questions(content))
+
+    results = await asyncio.gather(*(run_section(s) for s in sections), return_exceptions=True)
+    batches = [r for r in results if not isinstance(r, BaseException)]
+    if not batches:
+        raise results[0]
+
+    return merge_questions(batches, num_questions)
@@ -0,0 +1,261 @@
+# backend/ai_code/jobs.py
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import async_session_factory
+from models import GenerationJob
+
+# ⚙️ Job queue settings (override via environment)
+JOB_WORKERS = int(os.getenv("QUIZ_JOB_WORKERS", 2))
+JOB_QUEUE_MAX = int(os.getenv("QUIZ_JOB_QUEUE_MAX", 100))
+JOB_RETENTION_SECONDS = int(os.getenv("QUIZ_JOB_RETENTION_SECONDS", 3600))
+# How often an event stream re-reads a job that runs in another app process
+JOB_POLL_SECONDS = float(os.getenv("QUIZ_JOB_POLL_SECONDS", 1))
+
+TERMINAL_STATES = {"succeeded", "failed"}
+
+
+class QueueFullError(Exception):
+    """Raised when the queue already holds JOB_QUEUE_MAX pending jobs."""
+
+
+class Job:
+    def __init__(self, work: Callable[[], Awaitable[dict]], kind: str):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.status = "queued"
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.error_code: Optional[int] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._work = work
+        self._changed = asyncio.Event()
+
+    def _set_status(self, status: str):
+        self.status = status
+        # Wake anyone waiting on this transition, then arm a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def wait_for_change(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATES
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+            "error_code": self.error_code,
+        }
+
+    def to_row(self) -> dict:
+        row = self.to_dict()
+        result = row.pop("result")
+        row["result_json"] = json.dumps(result) if result is not None else None
+        return row
+
+
+def row_to_dict(row: GenerationJob) -> dict:
+    return {
+        "job_id": row.job_id,
+        "kind": row.kind,
+        "status": row.status,
+        "created_at": row.created_at,
+        "started_at": row.started_at,
+        "finished_at": row.finished_at,
+        "result": json.loads(row.result_json) if row.result_json else None,
+        "error": row.error,
+        "error_code": row.error_code,
+    }
+
+
+class JobQueue:
+    """
+    A bounded in-process queue drained by a fixed number of worker tasks.
+    Every status change is also written to GenerationJob, so any app
+    process can answer status polls; the counters in stats() are per process.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS, maxsize: int = JOB_QUEUE_MAX):
+        self.workers = workers
+        self.maxsize = maxsize
+        self.jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._running = 0
+        self._counts = {"submitted": 0, "succeeded": 0, "failed": 0, "rejected": 0}
+        self._latencies = deque(maxlen=500)  # seconds from submit to finish
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, work: Callable[[], Awaitable[dict]], kind: str = "generate_quiz") -> Job:
+        if self._queue is None:
+            raise RuntimeError("Job queue has not been started.")
+        await self._prune()
+        if self._queue.full():
+            self._counts["rejected"] += 1
+            raise QueueFullError()
+
+        # Stored before it is queued, so a poll to any process finds it at once
+        job = Job(work, kind)
+        async with async_session_factory() as session:
+            session.add(GenerationJob(**job.to_row()))
+            await session.commit()
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            # Filled up while the row was being written
+            async with async_session_factory() as session:
+                await session.execute(delete(GenerationJob).where(GenerationJob.job_id == job.job_id))
+                await session.commit()
+            self._counts["rejected"] += 1
+            raise QueueFullError()
+        self.jobs[job.job_id] = job
+        self._counts["submitted"] += 1
+        return job
+
+    async def load(self, session: AsyncSession, job_id: str) -> Optional[dict]:
+        """
+        A job's current state: from memory if this process runs it, else from the table.
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            return job.to_dict()
+        row = (await session.exec(select(GenerationJob).where(GenerationJob.job_id == job_id))).first()
+        return row_to_dict(row) if row else None
+
+    async def watch(self, job_id: str, heartbeat: float = 15) -> AsyncIterator[Optional[dict]]:
+        """
+        Yield the job's state on each status change until it finishes, and
+        None after `heartbeat` quiet seconds. Jobs owned by another process
+        are re-read every JOB_POLL_SECONDS.
+        """
+        last_status = None
+        quiet = 0.0
+        while True:
+            job = self.jobs.get(job_id)
+            if job:
+                snapshot = job.to_dict()
+            else:
+                # The stream outlives the request, so it opens its own sessions
+                async with async_session_factory() as session:
+                    snapshot = await self.load(session, job_id)
+                if snapshot is None:
+                    return
+
+            if snapshot["status"] != last_status:
+                last_status = snapshot["status"]
+                quiet = 0.0
+                yield snapshot
+            if last_status in TERMINAL_STATES:
+                return
+
+            if job:
+                if not await job.wait_for_change(timeout=heartbeat):
+                    yield None
+            else:
+                await asyncio.sleep(JOB_POLL_SECONDS)
+                quiet += JOB_POLL_SECONDS
+                if quiet >= heartbeat:
+                    quiet = 0.0
+                    yield None
+
+    async def _store(self, job: Job):
+        # Losing a status write must not take the worker down; this process still knows the state
+        try:
+            async with async_session_factory() as session:
+                await session.execute(
+                    update(GenerationJob).where(GenerationJob.job_id == job.job_id).values(**job.to_row())
+                )
+                await session.commit()
+        except Exception as e:
+            print(f"⚠️ Could not store status of job {job.job_id}: {e}")
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            self._running += 1
+            job.started_at = time.time()
+            job._set_status("running")
+            await self._store(job)
+            try:
+                job.result = await job._work()
+                self._counts["succeeded"] += 1
+                status = "succeeded"
+            except HTTPException as e:
+                job.error, job.error_code = str(e.detail), e.status_code
+                self._counts["failed"] += 1
+                status = "failed"
+            except Exception as e:
+                job.error, job.error_code = str(e), 500
+                self._counts["failed"] += 1
+                status = "failed"
+            finally:
+                self._running -= 1
+                self._queue.task_done()
+            job.finished_at = time.time()
+            self._latencies.append(job.finished_at - job.created_at)
+            job._set_status(status)
+            await self._store(job)
+
+    async def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [jid for jid, j in self.jobs.items() if j.done and j.finished_at < cutoff]
+        for jid in expired:
+            del self.jobs[jid]
+        async with async_session_factory() as session:
+            await session.execute(delete(GenerationJob).where(GenerationJob.finished_at < cutoff))
+            await session.commit()
+
+    def stats(self) -> dict:
+        latencies = sorted(self._latencies)
+        return {
+            **self._counts,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "running": self._running,
+            "workers": self.workers,
+            "max_queue": self.maxsize,
+            "latency_avg_seconds": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "latency_p95_seconds": (
+                round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+                if latencies else None
+            ),
+        }
+
+
+# Shared queue, started and stopped by the app lifespan
+job_queue = JobQueue()
@@ -0,0 +1,191 @@
+# backend/ai_code/pdf_extract.py
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional, Tuple
+
+import fitz
+from fastapi import UploadFile
+
+# ⚙️ Extraction settings (override via environment)
+SPOOL_CHUNK_SIZE = 1024 * 1024  # read uploads 1 MB at a time
+EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", os.cpu_count() or 2))
+PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 16))
+DEFAULT_TEXT_BUDGET = 3000  # characters of text the prompt actually uses
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Lazily create the process pool used for page extraction.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=EXTRACT_WORKERS)
+    return _executor
+
+
+def _discard_executor(broken: ProcessPoolExecutor):
+    """
+    Drop a pool that lost a worker; a broken pool fails every later submit,
+    so the next get_executor() call starts a fresh one.
+    """
+    global _executor
+    if _executor is broken:
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+# -----------------------------
+# 📥 Upload spooling
+# -----------------------------
+async def spool_upload(file: UploadFile, suffix: str = ".pdf") -> Tuple[str, str]:
+    """
+    Stream an upload to a temp file without holding it in memory.
+    Returns the temp path and the sha256 of the uploaded bytes.
+    The caller is responsible for removing the returned path.
+    """
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await file.read(SPOOL_CHUNK_SIZE):
+                digest.update(chunk)
+                out.write(chunk)
+    except Exception:
+        os.remove(path)
+        raise
+    return path, digest.hexdigest()
+
+
+# -----------------------------
+# 📄 Page extraction (runs in worker processes)
+# -----------------------------
+def _page_count(path: str) -> int:
+    with fitz.open(path) as doc:
+        return doc.page_count
+
+
+def _extract_pages(path: str, pages: List[int], budget: Optional[int]) -> str:
+    """
+    Extract the given pages in order and stop early once the budget is met.
+    """
+    parts = []
+    size = 0
+    with fitz.open(path) as doc:
+        for index in pages:
+            text = doc.load_page(index).get_text()
+            parts.append(text)
+            size += len(text)
+            if budget is not None and size >= budget:
+                break
+    return "".join(parts)
+
+
+def resolve_page_range(
+    page_count: int, first_page: Optional[int] = None, last_page: Optional[int] = None
+) -> Tuple[int, int]:
+    """
+    Convert 1-based inclusive page numbers into a 0-based [start, stop) range.
+    """
+    first = first_page or 1
+    last = last_page or page_count
+    if first < 1 or last < first or first > page_count:
+        raise ValueError(f"Invalid page range {first}-{last} for a {page_count}-page document.")
+    return first - 1, min(last, page_count)
+
+
+def sample_pages(start: int, stop: int, max_pages: Optional[int] = None) -> List[int]:
+    """
+    Every page in [start, stop), or max_pages of them spread evenly across it.
+    """
+    count = stop - start
+    if max_pages is None or count <= max_pages:
+        return list(range(start, stop))
+    step = count / max_pages
+    return [start + int(i * step) for i in range(max_pages)]
+
+
+async def extract_text(
+    path: str,
+    budget: Optional[int] = DEFAULT_TEXT_BUDGET,
+    first_page: Optional[int] = None,
+    last_page: Optional[int] = None,
+    max_pages: Optional[int] = None,
+) -> str:
+    """
+    Extract text from a PDF on disk using the process pool.
+
+    Page batches are dispatched in order with at most EXTRACT_WORKERS in flight,
+    so extraction stops as soon as `budget` characters have been collected.
+    With budget=None the whole range is read; max_pages then samples that
+    many pages evenly across it instead of reading every one.
+    """
+    executor = get_executor()
+    try:
+        return await _extract_with(executor, path, budget, first_page, last_page, max_pages)
+    except BrokenProcessPool:
+        # A worker crashed (e.g. a PDF that crashes PyMuPDF). This upload fails,
+        # but later ones get a fresh pool; retrying the same file would only crash it again.
+        _discard_executor(executor)
+        raise
+
+
+async def _extract_with(
+    executor: ProcessPoolExecutor,
+    path: str,
+    budget: Optional[int],
+    first_page: Optional[int],
+    last_page: Optional[int],
+    max_pages: Optional[int],
+) -> str:
+    loop = asyncio.get_running_loop()
+
+    page_count = await loop.run_in_executor(executor, _page_count, path)
+    start, stop = resolve_page_range(page_count, first_page, last_page)
+    pages = sample_pages(start, stop, max_pages)
+    batches = iter(range(0, len(pages), PAGES_PER_TASK))
+
+    pending = deque()
+
+    def submit_next() -> bool:
+        batch_start = next(batches, None)
+        if batch_start is None:
+            return False
+        batch = pages[batch_start:batch_start + PAGES_PER_TASK]
+        pending.append(loop.run_in_executor(executor, _extract_pages, path, batch, budget))
+        return True
+
+    for _ in range(EXTRACT_WORKERS):
+        if not submit_next():
+            break
+
+    parts = []
+    size = 0
+    try:
+        while pending:
+            text = await pending.popleft()
+            parts.append(text)
+            size += len(text)
+            if budget is not None and size >= budget:
+                break
+            submit_next()
+    finally:
+        for future in pending:
+            future.cancel()
+
+    text = "".join(parts)
+    return text if budget is None else text[:budget]
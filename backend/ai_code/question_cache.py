@@ -0,0 +1,115 @@
+# backend/ai_code/question_cache.py
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import delete
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import dialect_insert
+from models import GeneratedQuestionSet, utc_now
+
+# ⚙️ Cache limits (override via environment)
+CACHE_TTL_HOURS = int(os.getenv("QUESTION_CACHE_TTL_HOURS", 24 * 30))
+CACHE_MAX_ENTRIES = int(os.getenv("QUESTION_CACHE_MAX_ENTRIES", 1000))
+
+# Per-process counters, exposed via /quiz/cache_stats
+cache_counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+
+def make_cache_key(
+    pdf_digest: str,
+    num_questions: int,
+    difficulty: str,
+    first_page: Optional[int] = None,
+    last_page: Optional[int] = None,
+) -> str:
+    """
+    Content address for a generated question set: the PDF bytes plus
+    every parameter that changes what the LLM is asked for.
+    """
+    raw = f"{pdf_digest}|{num_questions}|{difficulty.lower()}|{first_page or ''}|{last_page or ''}"
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+async def get_cached_questions(session: AsyncSession, cache_key: str) -> Optional[dict]:
+    """
+    Return {"questions": [...], "duration_minutes": int|None} on a hit.
+    Expired entries are deleted and counted as misses.
+    """
+    entry = (await session.exec(
+        select(GeneratedQuestionSet).where(GeneratedQuestionSet.cache_key == cache_key)
+    )).first()
+
+    now = utc_now()
+    if entry and now - entry.created_at > timedelta(hours=CACHE_TTL_HOURS):
+        await session.delete(entry)
+        await session.commit()
+        cache_counters["evictions"] += 1
+        entry = None
+
+    if not entry:
+        cache_counters["misses"] += 1
+        return None
+
+    entry.hit_count += 1
+    entry.last_used_at = now
+    session.add(entry)
+    await session.commit()
+    cache_counters["hits"] += 1
+
+    return {
+        "questions": json.loads(entry.questions_json),
+        "duration_minutes": entry.duration_minutes,
+    }
+
+
+async def store_questions(
+    session: AsyncSession, cache_key: str, questions: list, duration_minutes: Optional[int] = None
+):
+    """
+    Save a generated question set, then evict least-recently-used entries
+    beyond CACHE_MAX_ENTRIES. If a concurrent upload of the same PDF stored
+    it first, that entry is kept.
+    """
+    now = utc_now()
+    upsert = dialect_insert(session)
+    await session.execute(
+        upsert(GeneratedQuestionSet).values(
+            cache_key=cache_key,
+            questions_json=json.dumps(questions),
+            duration_minutes=duration_minutes,
+            hit_count=0,
+            created_at=now,
+            last_used_at=now,
+        ).on_conflict_do_nothing(index_elements=["cache_key"])
+    )
+    await session.commit()
+
+    total = (await session.exec(select(func.count()).select_from(GeneratedQuestionSet))).one()
+    overflow = total - CACHE_MAX_ENTRIES
+    if overflow > 0:
+        stale_ids = (await session.exec(
+            select(GeneratedQuestionSet.id)
+            .order_by(GeneratedQuestionSet.last_used_at.asc())
+            .limit(overflow)
+        )).all()
+        await session.execute(delete(GeneratedQuestionSet).where(GeneratedQuestionSet.id.in_(stale_ids)))
+        await session.commit()
+        cache_counters["evictions"] += len(stale_ids)
+
+
+async def cache_stats(session: AsyncSession) -> dict:
+    entries = (await session.exec(select(func.count()).select_from(GeneratedQuestionSet))).one()
+    lookups = cache_counters["hits"] + cache_counters["misses"]
+    return {
+        **cache_counters,
+        "hit_rate": round(cache_counters["hits"] / lookups, 4) if lookups else 0.0,
+        "entries": entries,
+        "max_entries": CACHE_MAX_ENTRIES,
+        "ttl_hours": CACHE_TTL_HOURS,
+    }
@@ -1,22 +1,139 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends
-from sqlmodel import Session, select
-import json, re, fitz, requests
-from database import get_session
-from models import Quiz, Question, UserQuiz, User
-from typing import List, Union
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+import json, os
+from database import get_async_session, async_session_factory
+from ai_code.pdf_extract import spool_upload, extract_text
+from ai_code.generation import generate_questions, MAX_SOURCE_PAGES
+from ai_code.question_cache import make_cache_key, get_cached_questions, store_questions, cache_stats
+from ai_code.jobs import job_queue, QueueFullError
+from ai_code.duration import estimate_duration, model as duration_model
+from ai_code.quiz_store import validate_questions, save_quiz_with_questions
+from llm_client import chat
+from explanations import schedule_precompute
+from models import Quiz
+from principal import Principal, get_optional_principal, resolve_user
+from typing import Optional, Union
 from pydantic import BaseModel
 
 router = APIRouter()
 
-# 🔐 OpenRouter API Config
-OPENROUTER_API_KEY = "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"
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
-LLM_MODEL = "deepseek/deepseek-r1-0528-qwen3-8b:free"
+# Queue explanation generation right after a quiz is created (form field can override)
+PRECOMPUTE_EXPLANATIONS = os.getenv("PRECOMPUTE_EXPLANATIONS", "true").lower() == "true"
 
-class QuestionIn(BaseModel):
-    question: str
-    options: List[str]
-    correct_option: int
+def quiz_name_query(quiz_name: str):
+    return select(Quiz).where(Quiz.quiz_name == quiz_name)
+
+class GenerationRequest(BaseModel):
+    user_id: str
+    quiz_name: str
+    num_questions: int
+    num_users: int
+    difficulty: str = "medium"
+    duration_minutes: Union[int, None] = None
+    first_page: Union[int, None] = None
+    last_page: Union[int, None] = None
+    precompute_explanations: bool = True
+
+
+async def extract_source_text(pdf_path: str, req: GenerationRequest) -> str:
+    """
+    Read the requested page range; unreadable PDFs and bad ranges are 400s.
+    """
+    try:
+        # Read the whole range; generate_questions spreads its sections over all of it
+        return await extract_text(
+            pdf_path, budget=None, first_page=req.first_page, last_page=req.last_page,
+            max_pages=MAX_SOURCE_PAGES,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Could not read the uploaded PDF.")
+
+
+async def create_quiz_from_pdf(
+    session: AsyncSession, req: GenerationRequest, pdf_path: str, pdf_digest: str
+) -> dict:
+    """
+    Full generation pipeline for a spooled PDF: cache lookup, extraction,
+    question generation, duration suggestion and persistence.
+    Always removes pdf_path.
+    """
+    duration_minutes = req.duration_minutes
+    cache_key = make_cache_key(
+        pdf_digest, req.num_questions, req.difficulty, req.first_page, req.last_page
+    )
+
+    # ♻️ Same PDF + params seen before? Skip extraction and the LLM entirely
+    try:
+        cached = await get_cached_questions(session, cache_key)
+        if not cached:
+            text = await extract_source_text(pdf_path, req)
+    finally:
+        os.remove(pdf_path)
+
+    if cached:
+        questions_data = validate_questions(cached["questions"])
+        duration_minutes = duration_minutes or cached["duration_minutes"]
+    else:
+        # 🤖 Generate questions section by section across the whole document
+        try:
+            questions_data = await generate_questions(text, req.num_questions, req.difficulty, chat)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"LLM failed: {e}")
+
+    if not questions_data:
+        raise HTTPException(status_code=500, detail="LLM failed: no valid questions were generated.")
+
+    # ⏱️ Suggest quiz duration locally (calibrated from past attempts)
+    if not duration_minutes:
+        duration_minutes = estimate_duration(questions_data, req.difficulty)
+
+    if not cached:
+        await store_questions(session, cache_key, questions_data, duration_minutes)
+
+    # 💾 Quiz + all questions in one transaction; the unique name index settles
+    # races the earlier name checks cannot (e.g. two queued jobs, same name)
+    try:
+        quiz = await save_quiz_with_questions(
+            session,
+            quiz_name=req.quiz_name,
+            max_users=req.num_users,
+            creator_id=req.user_id,
+            difficulty=req.difficulty,
+            duration_minutes=duration_minutes,
+            questions=questions_data,
+        )
+    except IntegrityError:
+        raise HTTPException(status_code=400, detail="Quiz name already exists.")
+
+    # 🌙 Have explanations ready before the first student finishes
+    if req.precompute_explanations:
+        schedule_precompute(quiz.quiz_id)
+
+    # ✅ Response
+    return {
+        "status": "success",
+        "quiz_id": quiz.quiz_id,
+        "quiz_name": quiz.quiz_name,
+        "difficulty": quiz.difficulty,
+        "duration_minutes": quiz.duration_minutes,
+        "participants_attempted": quiz.participants_attempted,
+        "message": f"Created {len(questions_data)} questions"
+    }
+
+
+async def _run_generation_job(req: GenerationRequest, pdf_path: str, pdf_digest: str) -> dict:
+    # Background jobs outlive the request, so they own their session
+    async with async_session_factory() as session:
+        # The name may have been taken while this job sat in the queue
+        if (await session.exec(quiz_name_query(req.quiz_name))).first():
+            os.remove(pdf_path)
+            raise HTTPException(status_code=400, detail="Quiz name already exists.")
+        return await create_quiz_from_pdf(session, req, pdf_path, pdf_digest)
 
 
 @router.post("/generate_quiz")
@@ -27,129 +144,102 @@ async def generate_quiz(
     num_users: int = Form(...),
     difficulty: str = Form("medium"),
     duration_minutes: Union[int, None] = Form(None),
+    first_page: Union[int, None] = Form(None),
+    last_page: Union[int, None] = Form(None),
+    run_async: bool = Form(False),
+    precompute_explanations: bool = Form(PRECOMPUTE_EXPLANATIONS),
     file: UploadFile = File(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session),
+    principal: Optional[Principal] = Depends(get_optional_principal)
 ):
     # 👤 Validate user
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found.")
+    user = await resolve_user(session, user_id, principal)
 
     # 🚫 Prevent duplicate quiz name
-    if session.exec(select(Quiz).where(Quiz.quiz_name == quiz_name)).first():
+    if (await session.exec(quiz_name_query(quiz_name))).first():
         raise HTTPException(status_code=400, detail="Quiz name already exists.")
 
     # 📄 Read uploaded PDF
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported.")
-    content = await file.read()
-    doc = fitz.open(stream=content, filetype="pdf")
-    text = ''.join(page.get_text() for page in doc)
-
-    # 🤖 Prompt for quiz generation
-    prompt = f"""
-You are an educational quiz generation assistant. Based on the text provided, generate {num_questions} multiple-choice questions (MCQs) of {difficulty} difficulty level. Each question must:
-- Be relevant to the provided text.
-- Contain 4 answer options labeled A, B, C, and D.
-- Include a `correct_option` field (0 for A, 1 for B, etc.).
-Return the output as a pure JSON array of objects with:
-- `question`: string
-- `options`: list of 4 strings
-- `correct_option`: integer
-
-Here is the text:
-{text[:3000]}
-"""
-
-    # 📤 Call OpenRouter API to generate questions
+    pdf_path, pdf_digest = await spool_upload(file)
+
+    req = GenerationRequest(
+        user_id=user.user_id,
+        quiz_name=quiz_name,
+        num_questions=num_questions,
+        num_users=num_users,
+        difficulty=difficulty,
+        duration_minutes=duration_minutes,
+        first_page=first_page,
+        last_page=last_page,
+        precompute_explanations=precompute_explanations,
+    )
+
+    if not run_async:
+        return await create_quiz_from_pdf(session, req, pdf_path, pdf_digest)
+
+    # 📨 Hand the spooled PDF to the background workers and return immediately
     try:
-        res = requests.post(
-            OPENROUTER_URL,
-            headers={
-                'Authorization': f"Bearer {OPENROUTER_API_KEY}",
-                'Content-Type': 'application/json'
-            },
-            json={
-                'model': LLM_MODEL,
-                'messages': [{'role': 'user', 'content': prompt}]
-            }
-        )
-        res.raise_for_status()
-        data = res.json()
+        job = await job_queue.submit(lambda: _run_generation_job(req, pdf_path, pdf_digest))
+    except QueueFullError:
+        os.remove(pdf_path)
+        raise HTTPException(status_code=503, detail="Quiz generation queue is full. Try again shortly.")
 
-        if "choices" not in data:
-            raise ValueError(data.get("error", "Missing 'choices' in response."))
+    return {
+        "status": "queued",
+        "job_id": job.job_id,
+        "status_url": f"/quiz/jobs/{job.job_id}",
+        "events_url": f"/quiz/jobs/{job.job_id}/events",
+    }
 
-        content = data["choices"][0]["message"]["content"]
-        match = re.search(r"\[.*\]", content, re.DOTALL)
-        if not match:
-            raise ValueError("LLM response does not contain a JSON array.")
 
-        questions_data = json.loads(match.group(0))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"LLM failed: {e}")
+@router.get("/jobs/stats")
+def get_job_stats():
+    """
+    📈 Queue depth, job latency and failure counts for background generation.
+    """
+    return job_queue.stats()
 
-    # ⏱️ Optional: Suggest quiz duration using AI
-    if not duration_minutes:
-        time_prompt = f"Suggest time in minutes for a {difficulty} quiz with {len(questions_data)} questions. Only return a number."
 
-        try:
-            res2 = requests.post(
-                OPENROUTER_URL,
-                headers={
-                    'Authorization': f"Bearer {OPENROUTER_API_KEY}",
-                    'Content-Type': 'application/json'
-                },
-                json={
-                    'model': LLM_MODEL,
-                    'messages': [{'role': 'user', 'content': time_prompt}]
-                }
-            )
-            res2.raise_for_status()
-            data2 = res2.json()
-            if "choices" in data2:
-                time_text = data2["choices"][0]["message"]["content"]
-                suggested_time = int(re.search(r"\d+", time_text).group())
-                duration_minutes = suggested_time
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, session: AsyncSession = Depends(get_async_session)):
+    job = await job_queue.load(session, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, session: AsyncSession = Depends(get_async_session)):
+    """
+    📡 Server-sent events: one message per status change until the job finishes.
+    """
+    if not await job_queue.load(session, job_id):
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def events():
+        async for job in job_queue.watch(job_id):
+            if job is None:
+                # Heartbeat comment keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
             else:
-                duration_minutes = 10  # fallback
-        except Exception:
-            duration_minutes = 10  # fallback
+                yield f"event: {job['status']}\ndata: {json.dumps(job)}\n\n"
 
-    # 💾 Create quiz entry
-    quiz = Quiz(
-        quiz_name=quiz_name,
-        max_users=num_users,
-        creator_id=user.user_id,
-        difficulty=difficulty,
-        duration_minutes=duration_minutes
-    )
-    session.add(quiz)
-    session.commit()
-    session.refresh(quiz)
-
-    # 💾 Insert generated questions
-    for q in questions_data:
-        question = Question(
-            quiz_id=quiz.quiz_id,
-            question_text=q["question"],
-            option_a=q["options"][0],
-            option_b=q["options"][1],
-            option_c=q["options"][2],
-            option_d=q["options"][3],
-            correct_index=q["correct_option"]
-        )
-        session.add(question)
+    return StreamingResponse(events(), media_type="text/event-stream")
 
-    session.commit()
 
-    # ✅ Response
-    return {
-        "status": "success",
-        "quiz_id": quiz.quiz_id,
-        "quiz_name": quiz.quiz_name,
-        "difficulty": quiz.difficulty,
-        "duration_minutes": quiz.duration_minutes,
-        "participants_attempted": quiz.participants_attempted,
-        "message": f"Created {len(questions_data)} questions"
-    }
+@router.get("/cache_stats")
+async def get_cache_stats(session: AsyncSession = Depends(get_async_session)):
+    """
+    ♻️ Hit/miss counters and size of the generated-question cache.
+    """
+    return await cache_stats(session)
+
+
+@router.get("/duration_model")
+def get_duration_model():
+    """
+    ⏱️ Current duration-estimator calibration (multipliers per difficulty).
+    """
+    return duration_model
@@ -0,0 +1,86 @@
+# backend/ai_code/quiz_store.py
+
+from typing import List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Quiz, Question
+
+
+class QuestionIn(BaseModel):
+    question: str
+    options: List[str]
+    correct_option: int
+
+
+def validate_questions(raw: list) -> List[dict]:
+    """
+    Keep only well-formed LLM items: a non-empty question, exactly four
+    options and a correct_option between 0 and 3. Malformed items are dropped
+    before anything is written; survivors are normalised to plain dicts.
+    """
+    valid = []
+    for item in raw if isinstance(raw, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            q = QuestionIn(**item)
+        except Exception:
+            continue
+        if q.question.strip() and len(q.options) == 4 and 0 <= q.correct_option <= 3:
+            valid.append({
+                "question": q.question,
+                "options": q.options,
+                "correct_option": q.correct_option,
+            })
+    return valid
+
+
+async def save_quiz_with_questions(
+    session: AsyncSession,
+    quiz_name: str,
+    max_users: int,
+    creator_id: str,
+    difficulty: str,
+    duration_minutes: Optional[int],
+    questions: List[dict],
+) -> Quiz:
+    """
+    Write the quiz row and all its questions in one transaction, with the
+    questions sent as a single executemany insert.
+    """
+    quiz = Quiz(
+        quiz_name=quiz_name,
+        max_users=max_users,
+        creator_id=creator_id,
+        difficulty=difficulty,
+        duration_minutes=duration_minutes,
+        question_count=len(questions),
+    )
+    try:
+        session.add(quiz)
+        await session.flush()  # quiz row must exist before the question FKs point at it
+        await session.execute(
+            insert(Question),
+            [
+                {
+                    "quiz_id": quiz.quiz_id,
+                    "question_text": q["question"],
+                    "option_a": q["options"][0],
+                    "option_b": q["options"][1],
+                    "option_c": q["options"][2],
+                    "option_d": q["options"][3],
+                    "correct_index": q["correct_option"],
+                }
+                for q in questions
+            ],
+        )
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+    await session.refresh(quiz)
+    return quiz
@@ -0,0 +1,37 @@
+"""Make quiz names unique
+
+Revision ID: 3b8e5d2c7a41
+Revises: f06c42255f7f
+Create Date: 2026-10-18 16:12:05.418377
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e5d2c7a41'
+down_revision: Union[str, Sequence[str], None] = 'f06c42255f7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # generate_quiz checked names with a non-atomic check-then-insert; keep the
+    # earliest quiz's name and suffix later duplicates with their quiz_id
+    # (they have questions and results, so they are renamed rather than deleted).
+    op.execute(
+        "UPDATE quiz SET quiz_name = quiz_name || ' (' || quiz_id || ')' "
+        "WHERE id NOT IN (SELECT MIN(id) FROM quiz GROUP BY quiz_name)"
+    )
+    op.drop_index(op.f('ix_quiz_quiz_name'), table_name='quiz')
+    op.create_index(op.f('ix_quiz_quiz_name'), 'quiz', ['quiz_name'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_quiz_quiz_name'), table_name='quiz')
+    op.create_index(op.f('ix_quiz_quiz_name'), 'quiz', ['quiz_name'], unique=False)
@@ -0,0 +1,42 @@
+"""Unique quiz result per user and unique badge per quiz
+
+Revision ID: 5f2c9a1e4b73
+Revises: d7b21e7a3fa0
+Create Date: 2026-10-18 09:12:05.114230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f2c9a1e4b73'
+down_revision: Union[str, Sequence[str], None] = 'd7b21e7a3fa0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The old submit_answers wrote one QuizResult (and badge) per answered
+    # question; keep the earliest row of each group before adding constraints.
+    op.execute(
+        "DELETE FROM quizresult WHERE id NOT IN "
+        "(SELECT MIN(id) FROM quizresult GROUP BY user_id, quiz_id)"
+    )
+    op.execute(
+        "DELETE FROM userbadge WHERE quiz_id IS NOT NULL AND id NOT IN "
+        "(SELECT MIN(id) FROM userbadge GROUP BY user_id, quiz_id, badge_name, scope)"
+    )
+    op.create_unique_constraint('uq_quizresult_user_quiz', 'quizresult', ['user_id', 'quiz_id'])
+    op.create_unique_constraint(
+        'uq_userbadge_user_quiz_badge', 'userbadge', ['user_id', 'quiz_id', 'badge_name', 'scope']
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('uq_userbadge_user_quiz_badge', 'userbadge', type_='unique')
+    op.drop_constraint('uq_quizresult_user_quiz', 'quizresult', type_='unique')
@@ -0,0 +1,47 @@
+"""Store background generation job status
+
+Revision ID: 7c1d4e9b2f63
+Revises: 3b8e5d2c7a41
+Create Date: 2026-10-18 16:48:29.103644
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c1d4e9b2f63'
+down_revision: Union[str, Sequence[str], None] = '3b8e5d2c7a41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have made an empty copy at startup
+    if 'generationjob' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('generationjob',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.VARCHAR(), nullable=False),
+    sa.Column('kind', sa.VARCHAR(), nullable=False),
+    sa.Column('status', sa.VARCHAR(), nullable=False),
+    sa.Column('result_json', sa.VARCHAR(), nullable=True),
+    sa.Column('error', sa.VARCHAR(), nullable=True),
+    sa.Column('error_code', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.Float(), nullable=False),
+    sa.Column('started_at', sa.Float(), nullable=True),
+    sa.Column('finished_at', sa.Float(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_generationjob_job_id'), 'generationjob', ['job_id'], unique=True)
+    op.create_index(op.f('ix_generationjob_finished_at'), 'generationjob', ['finished_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_generationjob_finished_at'), table_name='generationjob')
+    op.drop_index(op.f('ix_generationjob_job_id'), table_name='generationjob')
+    op.drop_table('generationjob')
@@ -0,0 +1,47 @@
+"""Indexes for hot lookups
+
+Revision ID: 8d41b6e2c0f5
+Revises: 5f2c9a1e4b73
+Create Date: 2026-10-18 10:03:47.552918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d41b6e2c0f5'
+down_revision: Union[str, Sequence[str], None] = '5f2c9a1e4b73'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # get_quiz_by_id used a non-atomic check-then-insert; drop any duplicate
+    # participant rows it let through before making the pair unique.
+    op.execute(
+        "DELETE FROM userquiz WHERE id NOT IN "
+        "(SELECT MIN(id) FROM userquiz GROUP BY quiz_id, user_id)"
+    )
+    op.create_unique_constraint('uq_userquiz_quiz_user', 'userquiz', ['quiz_id', 'user_id'])
+
+    op.create_index('ix_quizresult_quiz_score_time', 'quizresult', ['quiz_id', 'score', 'time_taken'])
+    op.create_index('ix_answer_quiz_user', 'answer', ['quiz_id', 'user_id'])
+    op.create_index(op.f('ix_question_quiz_id'), 'question', ['quiz_id'])
+    op.create_index('ix_userbadge_user_scope_awarded', 'userbadge', ['user_id', 'scope', 'awarded_at'])
+    op.create_index(op.f('ix_quiz_quiz_name'), 'quiz', ['quiz_name'])
+    op.create_index(op.f('ix_user_username'), 'user', ['username'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_user_username'), table_name='user')
+    op.drop_index(op.f('ix_quiz_quiz_name'), table_name='quiz')
+    op.drop_index('ix_userbadge_user_scope_awarded', table_name='userbadge')
+    op.drop_index(op.f('ix_question_quiz_id'), table_name='question')
+    op.drop_index('ix_answer_quiz_user', table_name='answer')
+    op.drop_index('ix_quizresult_quiz_score_time', table_name='quizresult')
+    op.drop_constraint('uq_userquiz_quiz_user', 'userquiz', type_='unique')
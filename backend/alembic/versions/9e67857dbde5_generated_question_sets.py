@@ -0,0 +1,42 @@
+"""Content-addressed cache of generated question sets
+
+Revision ID: 9e67857dbde5
+Revises: c28d5b7e9a13
+Create Date: 2026-10-18 14:02:11.384205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e67857dbde5'
+down_revision: Union[str, Sequence[str], None] = 'c28d5b7e9a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have made an empty copy at startup
+    if 'generatedquestionset' in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_table('generatedquestionset',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cache_key', sa.VARCHAR(), nullable=False),
+    sa.Column('questions_json', sa.VARCHAR(), nullable=False),
+    sa.Column('duration_minutes', sa.Integer(), nullable=True),
+    sa.Column('hit_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_generatedquestionset_cache_key'), 'generatedquestionset', ['cache_key'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_generatedquestionset_cache_key'), table_name='generatedquestionset')
+    op.drop_table('generatedquestionset')
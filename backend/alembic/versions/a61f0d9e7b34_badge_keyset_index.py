@@ -0,0 +1,28 @@
+"""Index for keyset pagination of badges
+
+Revision ID: a61f0d9e7b34
+Revises: e4a9c3d81f62
+Create Date: 2026-10-18 12:41:52.087116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a61f0d9e7b34'
+down_revision: Union[str, Sequence[str], None] = 'e4a9c3d81f62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_userbadge_user_awarded_id', 'userbadge', ['user_id', 'awarded_at', 'id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_userbadge_user_awarded_id', table_name='userbadge')
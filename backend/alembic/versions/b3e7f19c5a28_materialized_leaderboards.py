@@ -0,0 +1,94 @@
+"""Materialized per-quiz and overall leaderboards
+
+Revision ID: b3e7f19c5a28
+Revises: 8d41b6e2c0f5
+Create Date: 2026-10-18 11:26:40.318407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3e7f19c5a28'
+down_revision: Union[str, Sequence[str], None] = '8d41b6e2c0f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have made empty copies at startup
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+    if 'quizleaderboard' not in existing:
+        _create_quiz_leaderboard()
+    if 'overallleaderboard' not in existing:
+        _create_overall_leaderboard()
+
+    # Backfill from existing results (same as `python -m leaderboard_store rebuild`)
+    op.execute('DELETE FROM overallleaderboard')
+    op.execute('DELETE FROM quizleaderboard')
+    op.execute(
+        'INSERT INTO quizleaderboard '
+        '(quiz_id, user_id, username, score, total_marks, time_taken, finished_at) '
+        'SELECT r.quiz_id, r.user_id, u.username, r.score, COALESCE(q.total_marks, 0), '
+        'r.time_taken, r.finished_at '
+        'FROM quizresult r JOIN "user" u ON u.user_id = r.user_id '
+        'LEFT JOIN (SELECT quiz_id, COUNT(*) AS total_marks FROM question GROUP BY quiz_id) q '
+        'ON q.quiz_id = r.quiz_id'
+    )
+    op.execute(
+        'INSERT INTO overallleaderboard '
+        '(user_id, username, score_sum, marks_sum, quizzes_taken, time_sum, average_score, updated_at) '
+        'SELECT user_id, username, SUM(score), SUM(total_marks), COUNT(*), SUM(time_taken), '
+        'SUM(score) * 100.0 / SUM(total_marks), CURRENT_TIMESTAMP '
+        'FROM quizleaderboard WHERE total_marks > 0 GROUP BY user_id, username'
+    )
+
+
+def _create_quiz_leaderboard() -> None:
+    op.create_table('quizleaderboard',
+    sa.Column('quiz_id', sa.VARCHAR(), nullable=False),
+    sa.Column('user_id', sa.VARCHAR(), nullable=False),
+    sa.Column('username', sa.VARCHAR(), nullable=False),
+    sa.Column('score', sa.Integer(), nullable=False),
+    sa.Column('total_marks', sa.Integer(), nullable=False),
+    sa.Column('time_taken', sa.Integer(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['quiz_id'], ['quiz.quiz_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('quiz_id', 'user_id')
+    )
+    op.create_index(
+        'ix_quizleaderboard_rank', 'quizleaderboard',
+        ['quiz_id', sa.text('score DESC'), 'time_taken', 'user_id'],
+    )
+
+
+def _create_overall_leaderboard() -> None:
+    op.create_table('overallleaderboard',
+    sa.Column('user_id', sa.VARCHAR(), nullable=False),
+    sa.Column('username', sa.VARCHAR(), nullable=False),
+    sa.Column('score_sum', sa.Integer(), nullable=False),
+    sa.Column('marks_sum', sa.Integer(), nullable=False),
+    sa.Column('quizzes_taken', sa.Integer(), nullable=False),
+    sa.Column('time_sum', sa.Integer(), nullable=False),
+    sa.Column('average_score', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index(
+        'ix_overallleaderboard_rank', 'overallleaderboard',
+        [sa.text('average_score DESC'), 'user_id'],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_overallleaderboard_rank', table_name='overallleaderboard')
+    op.drop_table('overallleaderboard')
+    op.drop_index('ix_quizleaderboard_rank', table_name='quizleaderboard')
+    op.drop_table('quizleaderboard')
@@ -0,0 +1,54 @@
+"""Per-user badge aggregates and unique overall badges
+
+Revision ID: c28d5b7e9a13
+Revises: a61f0d9e7b34
+Create Date: 2026-10-18 13:17:05.472830
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c28d5b7e9a13'
+down_revision: Union[str, Sequence[str], None] = 'a61f0d9e7b34'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have made an empty copy at startup
+    if 'userstats' not in sa.inspect(op.get_bind()).get_table_names():
+        op.create_table('userstats',
+        sa.Column('user_id', sa.VARCHAR(), nullable=False),
+        sa.Column('quizzes_completed', sa.Integer(), nullable=False),
+        sa.Column('accuracy_sum', sa.Float(), nullable=False),
+        sa.Column('recent_accuracies', sa.VARCHAR(), nullable=False),
+        sa.Column('current_streak_days', sa.Integer(), nullable=False),
+        sa.Column('longest_streak_days', sa.Integer(), nullable=False),
+        sa.Column('last_active_on', sa.Date(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+        )
+
+    # quiz_id is NULL on overall badges, so uq_userbadge_user_quiz_badge never
+    # matched them; keep the earliest of any duplicates before indexing.
+    op.execute(
+        "DELETE FROM userbadge WHERE scope = 'overall' AND id NOT IN "
+        "(SELECT MIN(id) FROM userbadge WHERE scope = 'overall' GROUP BY user_id, badge_name)"
+    )
+    op.create_index(
+        'uq_userbadge_user_overall_badge', 'userbadge', ['user_id', 'badge_name'], unique=True,
+        postgresql_where=sa.text("scope = 'overall'"), sqlite_where=sa.text("scope = 'overall'"),
+    )
+    # Aggregates are filled by `python -m badge_engine backfill`
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_userbadge_user_overall_badge', table_name='userbadge')
+    op.drop_table('userstats')
@@ -0,0 +1,33 @@
+"""Denormalized question count on quiz
+
+Revision ID: e4a9c3d81f62
+Revises: b3e7f19c5a28
+Create Date: 2026-10-18 12:08:19.640273
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a9c3d81f62'
+down_revision: Union[str, Sequence[str], None] = 'b3e7f19c5a28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('quiz', sa.Column('question_count', sa.Integer(), nullable=False, server_default='0'))
+    # Questions never change after creation, so one backfill is enough
+    op.execute(
+        'UPDATE quiz SET question_count = '
+        '(SELECT COUNT(*) FROM question WHERE question.quiz_id = quiz.quiz_id)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('quiz', 'question_count')
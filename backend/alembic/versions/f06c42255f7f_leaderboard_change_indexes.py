@@ -0,0 +1,34 @@
+"""Index leaderboard change timestamps for incremental rank-index sync
+
+Revision ID: f06c42255f7f
+Revises: 9e67857dbde5
+Create Date: 2026-10-18 14:41:37.902516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f06c42255f7f'
+down_revision: Union[str, Sequence[str], None] = '9e67857dbde5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # create_db_and_tables() may already have built these from the models at startup
+    inspector = sa.inspect(op.get_bind())
+    if 'ix_quizleaderboard_finished_at' not in {i['name'] for i in inspector.get_indexes('quizleaderboard')}:
+        op.create_index('ix_quizleaderboard_finished_at', 'quizleaderboard', ['finished_at'], unique=False)
+    if 'ix_overallleaderboard_updated_at' not in {i['name'] for i in inspector.get_indexes('overallleaderboard')}:
+        op.create_index('ix_overallleaderboard_updated_at', 'overallleaderboard', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_overallleaderboard_updated_at', table_name='overallleaderboard')
+    op.drop_index('ix_quizleaderboard_finished_at', table_name='quizleaderboard')
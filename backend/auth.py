@@ -2,26 +2,38 @@
 
 from fastapi import APIRouter, HTTPException, Form, Depends
 from fastapi import status
-from sqlmodel import Session, select
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from pydantic import BaseModel, EmailStr
-from database import get_session
+from database import get_async_session
 from models import User
-from utils import hash_password, verify_password, create_access_token
+from utils import create_access_token
+from password_pool import hash_password_async, verify_password_async, PasswordPoolBusy, pool_stats
+from principal import Principal, get_current_principal, cache_stats as principal_cache_stats
 from uuid import uuid4
 from models import UserCreate, UserRead  # Pydantic schemas
 
 router = APIRouter()
 
+def password_pool_busy() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Too many sign-ins at once. Please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/signup", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def signup(user_in: UserCreate, session: Session = Depends(get_session)):
+async def signup(user_in: UserCreate, session: AsyncSession = Depends(get_async_session)):
     # 1. Check if email already exists
-    existing = session.query(User).filter(User.email == user_in.email).first()
+    existing = (await session.exec(select(User).where(User.email == user_in.email))).first()
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     # 2. Hash the incoming plaintext password
     try:
-        hashed = hash_password(user_in.password)
+        hashed = await hash_password_async(user_in.password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
     except Exception as exc:
         # If bcrypt is still misconfigured, you'll catch it here
         raise HTTPException(status_code=500, detail="Error hashing password")
@@ -37,24 +49,41 @@ def signup(user_in: UserCreate, session: Session = Depends(get_session)):
     # 4. Persist and return
     session.add(new_user)
     try:
-        session.commit()
-        session.refresh(new_user)
+        await session.commit()
+        await session.refresh(new_user)
     except Exception as exc:
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=500, detail="Error creating user")
 
     return new_user
+def login_user_query(identifier: str):
+    return select(User).where((User.email == identifier) | (User.username == identifier))
+
 @router.post("/login")
-def login(identifier: str = Form(...), password: str = Form(...), session: Session = Depends(get_session)):
+async def login(identifier: str = Form(...), password: str = Form(...), session: AsyncSession = Depends(get_async_session)):
     # Check for user by email or username
-    user = session.exec(
-        select(User).where((User.email == identifier) | (User.username == identifier))
-    ).first()
+    user = (await session.exec(login_user_query(identifier))).first()
     
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials.")
+
     # ❗ Fix the password check to use hashed_password
-    if not user or not verify_password(password, user.hashed_password):
+    try:
+        valid, new_hash = await verify_password_async(password, user.hashed_password)
+    except PasswordPoolBusy:
+        raise password_pool_busy()
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials.")
 
+    # 🔁 Transparently upgrade hashes made with an old BCRYPT_ROUNDS
+    if new_hash:
+        user.hashed_password = new_hash
+        session.add(user)
+        try:
+            await session.commit()
+        except Exception:
+            await session.rollback()  # keep the old hash; try again next login
+
     # Create JWT token with user ID
     token = create_access_token({"sub": user.user_id})
     
@@ -63,3 +92,24 @@ def login(identifier: str = Form(...), password: str = Form(...), session: Sessi
         "user_id": user.user_id,
         "username": user.username
     }
+
+@router.get("/password_pool_stats")
+def get_password_pool_stats():
+    """
+    🔐 In-flight, completed and rejected hashing jobs in this worker.
+    """
+    return pool_stats()
+
+@router.get("/me")
+async def get_me(principal: Principal = Depends(get_current_principal)):
+    """
+    👤 The user behind the bearer token; served from cache once warm.
+    """
+    return principal
+
+@router.get("/principal_cache_stats")
+def get_principal_cache_stats():
+    """
+    🪪 Hit rates of this worker's verified-token and principal caches.
+    """
+    return principal_cache_stats()
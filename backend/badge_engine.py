@@ -0,0 +1,299 @@
+# backend/badge_engine.py
+#
+# Overall badges. Rules are declared as data below and evaluated against
+# per-user running aggregates (UserStats), which submit_answers updates
+# incrementally. A backfill walks QuizResult in batches to rebuild the
+# aggregates and award anything missing:
+#   python -m badge_engine backfill [--batch-size 1000]
+
+import argparse
+import json
+import sys
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import Date, Integer, cast, delete, func, insert, literal, text
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import dialect_insert
+from models import QuizResult, UserBadge, UserStats, utc_now
+
+# -----------------------------
+# 📜 RULES
+# -----------------------------
+# metric: quizzes_completed | lifetime_average | recent_average | streak_days
+# recent_average needs `window` results before it can be earned.
+OVERALL_BADGE_RULES = [
+    {"name": "Quiz Explorer", "metric": "quizzes_completed", "at_least": 10},
+    {"name": "Quiz Veteran", "metric": "quizzes_completed", "at_least": 50},
+    {"name": "Sharp Streak", "metric": "recent_average", "window": 5, "at_least": 90},
+    {"name": "Consistent Scholar", "metric": "recent_average", "window": 10, "at_least": 80},
+    {"name": "On a Roll", "metric": "streak_days", "at_least": 3},
+    {"name": "Week Warrior", "metric": "streak_days", "at_least": 7},
+]
+
+# Only as many recent accuracies as the widest window are kept per user
+RECENT_WINDOW = max((r.get("window", 0) for r in OVERALL_BADGE_RULES), default=0) or 1
+
+OVERALL_BADGE_CONFLICT = {"index_elements": ["user_id", "badge_name"], "index_where": text("scope = 'overall'")}
+
+
+def metric_value(stats: dict, rule: dict) -> Optional[float]:
+    metric = rule["metric"]
+    if metric == "quizzes_completed":
+        return stats["quizzes_completed"]
+    if metric == "lifetime_average":
+        count = stats["quizzes_completed"]
+        return stats["accuracy_sum"] / count if count else None
+    if metric == "recent_average":
+        recent = stats["recent_accuracies"][-rule["window"]:]
+        return sum(recent) / len(recent) if len(recent) >= rule["window"] else None
+    if metric == "streak_days":
+        return stats["longest_streak_days"]
+    raise ValueError(f"Unknown badge metric: {metric}")
+
+
+def earned_badges(stats: dict) -> List[str]:
+    earned = []
+    for rule in OVERALL_BADGE_RULES:
+        value = metric_value(stats, rule)
+        if value is not None and value >= rule["at_least"]:
+            earned.append(rule["name"])
+    return earned
+
+
+# -----------------------------
+# 🧮 AGGREGATES
+# -----------------------------
+def empty_stats(user_id: str) -> dict:
+    return {
+        "user_id": user_id,
+        "quizzes_completed": 0,
+        "accuracy_sum": 0.0,
+        "recent_accuracies": [],
+        "current_streak_days": 0,
+        "longest_streak_days": 0,
+        "last_active_on": None,
+    }
+
+
+def activity_date(finished_at: datetime) -> date:
+    if finished_at.tzinfo is not None:
+        finished_at = finished_at.astimezone(timezone.utc)
+    return finished_at.date()  # naive values are stored as UTC
+
+
+def apply_result(stats: dict, accuracy: float, finished_on: date) -> dict:
+    """
+    Fold one result into a user's aggregates. O(1) per result.
+    """
+    stats["quizzes_completed"] += 1
+    stats["accuracy_sum"] += accuracy
+    stats["recent_accuracies"] = (stats["recent_accuracies"] + [accuracy])[-RECENT_WINDOW:]
+
+    last = stats["last_active_on"]
+    if last is None or finished_on > last:
+        consecutive = last is not None and finished_on - last == timedelta(days=1)
+        stats["current_streak_days"] = stats["current_streak_days"] + 1 if consecutive else 1
+        stats["last_active_on"] = finished_on
+    stats["longest_streak_days"] = max(stats["longest_streak_days"], stats["current_streak_days"])
+    return stats
+
+
+def stats_to_row(stats: dict) -> dict:
+    return {**stats, "recent_accuracies": json.dumps(stats["recent_accuracies"]), "updated_at": utc_now()}
+
+
+def stats_from_row(row: UserStats) -> dict:
+    return {
+        "user_id": row.user_id,
+        "quizzes_completed": row.quizzes_completed,
+        "accuracy_sum": row.accuracy_sum,
+        "recent_accuracies": json.loads(row.recent_accuracies),
+        "current_streak_days": row.current_streak_days,
+        "longest_streak_days": row.longest_streak_days,
+        "last_active_on": row.last_active_on,
+    }
+
+
+def overall_badge_row(user_id: str, badge_name: str) -> dict:
+    return {
+        "user_id": user_id,
+        "quiz_id": None,
+        "badge_name": badge_name,
+        "scope": "overall",
+        "awarded_at": utc_now(),
+    }
+
+
+async def record_result(session: AsyncSession, user_id: str, accuracy: float, finished_at: datetime) -> List[str]:
+    """
+    Update the user's aggregates for one submission and award any overall
+    badges now earned. Runs in the caller's transaction; returns the names
+    of badges awarded by this call.
+    """
+    upsert = dialect_insert(session)
+
+    # Make sure the row exists, then lock it so concurrent submissions by
+    # the same user apply one after the other (SQLite serialises writers anyway)
+    await session.execute(
+        upsert(UserStats).values(**stats_to_row(empty_stats(user_id)))
+        .on_conflict_do_nothing(index_elements=["user_id"])
+    )
+    row = (await session.exec(
+        select(UserStats).where(UserStats.user_id == user_id).with_for_update()
+    )).one()
+
+    stats = apply_result(stats_from_row(row), accuracy, activity_date(finished_at))
+    for field, value in stats_to_row(stats).items():
+        setattr(row, field, value)
+    session.add(row)
+
+    awarded = []
+    for badge_name in earned_badges(stats):
+        inserted = (await session.execute(
+            upsert(UserBadge).values(**overall_badge_row(user_id, badge_name))
+            .on_conflict_do_nothing(**OVERALL_BADGE_CONFLICT)
+            .returning(UserBadge.id)
+        )).first()
+        if inserted:
+            awarded.append(badge_name)
+    return awarded
+
+
+# -----------------------------
+# 🔁 BACKFILL
+# -----------------------------
+EPOCH = date(1970, 1, 1)
+
+
+def epoch_day(column, dialect: str):
+    """
+    Whole UTC days since 1970-01-01 for a naive-UTC timestamp column.
+    """
+    if dialect == "postgresql":
+        return cast(column, Date) - literal(EPOCH)
+    return cast(func.julianday(func.date(column)) - 2440587.5, Integer)  # SQLite
+
+
+def batch_aggregates(session: Session, first_user: str, last_user: str) -> List[dict]:
+    """
+    Aggregates for every user in [first_user, last_user], computed in SQL:
+    counts and sums by GROUP BY, the recent window by row_number(), and
+    streaks as gaps-and-islands over distinct activity days (day minus its
+    row number is constant within a run of consecutive days). Gives the
+    same result as folding each user's results through apply_result.
+    """
+    in_batch = QuizResult.user_id.between(first_user, last_user)
+    dialect = session.get_bind().dialect.name
+
+    stats = {}
+    for user_id, count, accuracy_sum in session.exec(
+        select(QuizResult.user_id, func.count(), func.sum(QuizResult.accuracy))
+        .where(in_batch)
+        .group_by(QuizResult.user_id)
+    ).all():
+        stats[user_id] = {**empty_stats(user_id), "quizzes_completed": count, "accuracy_sum": float(accuracy_sum or 0)}
+
+    ranked = select(
+        QuizResult.user_id,
+        QuizResult.accuracy,
+        func.row_number().over(
+            partition_by=QuizResult.user_id, order_by=(QuizResult.finished_at.desc(), QuizResult.id.desc())
+        ).label("newest"),
+    ).where(in_batch).subquery()
+    for user_id, accuracy in session.exec(
+        select(ranked.c.user_id, ranked.c.accuracy)
+        .where(ranked.c.newest <= RECENT_WINDOW)
+        .order_by(ranked.c.user_id, ranked.c.newest.desc())  # oldest first, like apply_result
+    ).all():
+        stats[user_id]["recent_accuracies"].append(accuracy)
+
+    days = select(QuizResult.user_id, epoch_day(QuizResult.finished_at, dialect).label("day")) \
+        .where(in_batch).distinct().subquery()
+    numbered = select(
+        days.c.user_id,
+        days.c.day,
+        (days.c.day - func.row_number().over(partition_by=days.c.user_id, order_by=days.c.day)).label("island"),
+    ).subquery()
+    islands = select(
+        numbered.c.user_id, func.count().label("length"), func.max(numbered.c.day).label("last_day"),
+    ).group_by(numbered.c.user_id, numbered.c.island).subquery()
+    latest = select(
+        islands.c.user_id,
+        islands.c.length,
+        islands.c.last_day,
+        func.max(islands.c.length).over(partition_by=islands.c.user_id).label("longest"),
+        func.row_number().over(partition_by=islands.c.user_id, order_by=islands.c.last_day.desc()).label("recency"),
+    ).subquery()
+    for user_id, current, longest, last_day in session.exec(
+        select(latest.c.user_id, latest.c.length, latest.c.longest, latest.c.last_day).where(latest.c.recency == 1)
+    ).all():
+        stats[user_id].update(
+            current_streak_days=current,
+            longest_streak_days=longest,
+            last_active_on=EPOCH + timedelta(days=int(last_day)),
+        )
+
+    return list(stats.values())
+
+
+def backfill(session: Session, batch_size: int = 1000) -> dict:
+    """
+    Rebuild every user's aggregates from QuizResult and award missing
+    overall badges. Users are taken in keyset batches of batch_size; each
+    batch's aggregates are computed in SQL (batch_aggregates), written
+    with one executemany per table and committed. Run it while
+    submissions are paused; it starts by clearing UserStats.
+    """
+    upsert = dialect_insert(session)
+    session.execute(delete(UserStats))
+    session.commit()
+
+    counters = {"users": 0, "results": 0, "awarded_badges": 0, "batches": 0}
+    last_user = None
+
+    while True:
+        query = select(QuizResult.user_id).group_by(QuizResult.user_id).order_by(QuizResult.user_id).limit(batch_size)
+        if last_user is not None:
+            query = query.where(QuizResult.user_id > last_user)
+        user_ids = session.exec(query).all()
+        if not user_ids:
+            break
+
+        batch = batch_aggregates(session, user_ids[0], user_ids[-1])
+        session.execute(insert(UserStats), [stats_to_row(s) for s in batch])
+        badges = [overall_badge_row(s["user_id"], name) for s in batch for name in earned_badges(s)]
+        if badges:
+            # RETURNING yields only rows actually inserted, so re-runs count nothing twice
+            inserted = session.execute(
+                upsert(UserBadge).on_conflict_do_nothing(**OVERALL_BADGE_CONFLICT).returning(UserBadge.id),
+                badges,
+            ).all()
+            counters["awarded_badges"] += len(inserted)
+        session.commit()
+
+        counters["users"] += len(batch)
+        counters["results"] += sum(s["quizzes_completed"] for s in batch)
+        counters["batches"] += 1
+        last_user = user_ids[-1]
+
+    return counters
+
+
+def main() -> int:
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild per-user badge aggregates and award overall badges.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--batch-size", type=int, default=1000, help="users per batch")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        print(f"✅ Backfill complete: {backfill(session, args.batch_size)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
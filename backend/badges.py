@@ -1,38 +1,82 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import select, Session, desc
+from sqlmodel import select, desc, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 from models import UserBadge
-from database import get_session
+from database import get_async_session
+from pagination import page_size, decode_cursor, split_page
+from datetime import datetime
 from typing import Optional, Dict, List
+from badge_engine import OVERALL_BADGE_RULES
 
 router = APIRouter()
 
+BADGE_CURSOR = "badges"
+
+def badge_filters(user_id: str, quiz_id: Optional[str] = None, scope: Optional[str] = None) -> list:
+    filters = [UserBadge.user_id == user_id]
+    if quiz_id:
+        filters.append(UserBadge.quiz_id == quiz_id)
+    if scope:
+        filters.append(UserBadge.scope == scope)
+    return filters
+
+def badges_page_query(filters: list, limit: int, after: Optional[tuple] = None):
+    """
+    One page (plus one row) of badges, newest first; `after` is the
+    (awarded_at, id) of the previous page's last badge.
+    """
+    query = (
+        select(UserBadge)
+        .where(*filters)
+        .order_by(desc(UserBadge.awarded_at), desc(UserBadge.id))
+        .limit(limit + 1)
+    )
+    if after:
+        awarded_at, badge_id = after
+        query = query.where(
+            UserBadge.awarded_at <= awarded_at,
+            (UserBadge.awarded_at < awarded_at)
+            | ((UserBadge.awarded_at == awarded_at) & (UserBadge.id < badge_id))
+        )
+    return query
+
 @router.get("/badges/{user_id}")
-def get_badges(
+async def get_badges(
     user_id: str,
     quiz_id: Optional[str] = Query(None, description="Filter by quiz_id (optional)"),
     scope: Optional[str] = Query(None, description="Filter by scope: 'per_quiz' or 'overall'"),
-    session: Session = Depends(get_session)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Depends(page_size),
+    session: AsyncSession = Depends(get_async_session)
 ):
     """
-    🎖️ Get all badges for a given user, grouped by scope.
+    🎖️ Get a user's badges, newest first, grouped by scope; one page at a time.
     """
-    # Build base query
-    query = select(UserBadge).where(UserBadge.user_id == user_id)
+    # Build base filter
+    filters = badge_filters(user_id, quiz_id, scope)
 
-    if quiz_id:
-        query = query.where(UserBadge.quiz_id == quiz_id)
-
-    if scope:
-        query = query.where(UserBadge.scope == scope)
+    after = None
+    if cursor:
+        # ⏩ Seek past the last badge of the previous page
+        awarded_at, badge_id = decode_cursor(cursor, BADGE_CURSOR, (str, int))
+        try:
+            after = (datetime.fromisoformat(awarded_at), badge_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        if after[0].tzinfo is not None:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")  # awarded_at is stored naive
+    query = badges_page_query(filters, limit, after)
 
-    query = query.order_by(desc(UserBadge.awarded_at))
-    user_badges = session.exec(query).all()
+    user_badges, next_cursor = split_page(
+        (await session.exec(query)).all(), limit, BADGE_CURSOR, lambda b: (b.awarded_at.isoformat(), b.id)
+    )
 
     if not user_badges:
         return {
             "user_id": user_id,
             "badge_count": 0,
             "badges": {},
+            "next_cursor": None,
             "message": "No badges found for this user."
         }
 
@@ -47,8 +91,19 @@ def get_badges(
         }
         grouped_badges.setdefault(badge.scope, []).append(badge_info)
 
+    # Total across all pages; an index range count on (user_id, ...)
+    badge_count = (await session.exec(select(func.count()).select_from(UserBadge).where(*filters))).one()
+
     return {
         "user_id": user_id,
-        "badge_count": len(user_badges),
-        "badges": grouped_badges
+        "badge_count": badge_count,
+        "badges": grouped_badges,
+        "next_cursor": next_cursor
     }
+
+@router.get("/rules")
+def get_badge_rules():
+    """
+    📜 Rules for overall badges (evaluated on every submission).
+    """
+    return OVERALL_BADGE_RULES
@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_login_load.py
+#
+# Login storm vs everyone else: hammers /auth/login with concurrent
+# clients while a probe keeps timing a cheap read route, and reports
+# logins/sec, fast 503 rejections and the probe's latency percentiles.
+# Start the API first (e.g. `uvicorn main:app`), then from backend/:
+#   python -m benchmarks.bench_login_load
+#   python -m benchmarks.bench_login_load --base-url http://127.0.0.1:8000 --clients 200 --seconds 20
+# Run it once with --clients 0 for the probe's unloaded baseline.
+
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+
+import httpx
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+async def create_account(client: httpx.AsyncClient) -> tuple:
+    name = f"bench-{uuid.uuid4().hex[:12]}"
+    password = "bench-password"
+    res = await client.post("/auth/signup", json={
+        "username": name, "email": f"{name}@bench.local", "password": password
+    })
+    res.raise_for_status()
+    return name, password
+
+
+async def login_worker(client: httpx.AsyncClient, name: str, password: str, deadline: float, outcomes: Counter):
+    while time.perf_counter() < deadline:
+        try:
+            res = await client.post("/auth/login", data={"identifier": name, "password": password})
+            outcomes[res.status_code] += 1
+            if res.status_code == 503:
+                await asyncio.sleep(float(res.headers.get("Retry-After", 1)) / 10)
+        except httpx.HTTPError as e:
+            outcomes[type(e).__name__] += 1
+
+
+async def probe(client: httpx.AsyncClient, path: str, deadline: float, latencies: list):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            await client.get(path)
+            latencies.append((time.perf_counter() - start) * 1000)
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.05)
+
+
+async def run(base_url: str, clients: int, seconds: float, probe_path: str):
+    limits = httpx.Limits(max_connections=clients + 10)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        name, password = await create_account(client)
+        outcomes: Counter = Counter()
+        latencies: list = []
+        deadline = time.perf_counter() + seconds
+
+        start = time.perf_counter()
+        await asyncio.gather(
+            probe(client, probe_path, deadline, latencies),
+            *(login_worker(client, name, password, deadline, outcomes) for _ in range(clients)),
+        )
+        elapsed = time.perf_counter() - start
+
+        stats = (await client.get("/auth/password_pool_stats")).json()
+
+    print(f"clients={clients} duration={elapsed:.1f}s")
+    print(f"logins/sec (200): {outcomes[200] / elapsed:8.1f}   outcomes={dict(outcomes)}")
+    print(f"probe {probe_path}: n={len(latencies)} p50={percentile(latencies, 0.5):.1f} ms "
+          f"p95={percentile(latencies, 0.95):.1f} ms p99={percentile(latencies, 0.99):.1f} ms")
+    print(f"password pool: {stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--probe-path", default="/leaderboard/overall?limit=10")
+    args = parser.parse_args()
+    asyncio.run(run(args.base_url, args.clients, args.seconds, args.probe_path))
+
+
+if __name__ == "__main__":
+    main()
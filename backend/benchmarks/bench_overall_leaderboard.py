@@ -0,0 +1,174 @@
+# backend/benchmarks/bench_overall_leaderboard.py
+#
+# Query count and latency of the overall leaderboard: the old
+# per-quiz/per-user query loop, the single grouped query over QuizResult,
+# and the materialized OverallLeaderboard read the route now serves.
+# Run from backend/:
+#   python -m benchmarks.bench_overall_leaderboard
+#   BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_overall_leaderboard
+# The Postgres run creates tables in the target database; point it at a scratch DB.
+
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+import uuid
+from datetime import datetime
+
+from fastapi import Response
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import User, Quiz, Question, QuizResult
+from database import to_async_url
+from leaderboard import get_overall_leaderboard
+from leaderboard_store import rebuild, quiz_rows_from_results, overall_rows_from
+from pagination import PAGE_SIZE_MAX, NEXT_CURSOR_HEADER
+
+
+def seed(url: str, users: int, quizzes: int, per_user: int, questions: int):
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    now = datetime.now()
+    rng = random.Random(7)
+    user_ids = [str(uuid.uuid4()) for _ in range(users)]
+    quiz_ids = [str(uuid.uuid4()) for _ in range(quizzes)]
+
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"user_id": uid, "username": f"lb{i}-{uid[:8]}", "email": f"{uid}@bench.local", "hashed_password": "x"}
+            for i, uid in enumerate(user_ids)
+        ])
+        session.execute(insert(Quiz), [
+            {"quiz_id": qid, "quiz_name": f"lb-{qid}", "max_users": users, "participants_attempted": 0,
+             "question_count": questions,
+             "creator_id": user_ids[0], "created_at": now, "difficulty": "medium"}
+            for qid in quiz_ids
+        ])
+        session.execute(insert(Question), [
+            {"quiz_id": qid, "question_text": f"q{n}", "option_a": "a", "option_b": "b",
+             "option_c": "c", "option_d": "d", "correct_index": n % 4}
+            for qid in quiz_ids for n in range(questions)
+        ])
+        session.execute(insert(QuizResult), [
+            {"user_id": uid, "quiz_id": qid, "score": rng.randint(0, questions),
+             "accuracy": 0.0, "time_taken": rng.randint(1, 30), "finished_at": now}
+            for uid in user_ids for qid in rng.sample(quiz_ids, per_user)
+        ])
+        session.commit()
+        rebuild(session)
+    engine.dispose()
+
+
+async def legacy_overall(session: AsyncSession):
+    # Mirrors the original get_overall_leaderboard: 1 + Q + U queries
+    quizzes = (await session.exec(select(Quiz))).all()
+    counts = {}
+    for quiz in quizzes:
+        counts[quiz.quiz_id] = (await session.exec(
+            select(func.count()).select_from(Question).where(Question.quiz_id == quiz.quiz_id)
+        )).first()
+    results = (await session.exec(select(QuizResult.user_id, QuizResult.quiz_id, QuizResult.score))).all()
+
+    user_scores = {}
+    for user_id, quiz_id, score in results:
+        total = counts.get(quiz_id, 0)
+        if not total:
+            continue
+        acc = user_scores.setdefault(user_id, [0, 0])
+        acc[0] += score * 100
+        acc[1] += total * 100
+
+    leaderboard = []
+    for user_id, (score_sum, max_total) in user_scores.items():
+        user = (await session.exec(select(User).where(User.user_id == user_id))).first()
+        if user and max_total:
+            leaderboard.append({
+                "username": user.username,
+                "user_id": user.user_id,
+                "average_score": round(score_sum / max_total * 100, 2),
+            })
+    leaderboard.sort(key=lambda x: x["average_score"], reverse=True)
+    return leaderboard
+
+
+async def measure(url: str, label: str, limit: int):
+    async_engine = create_async_engine(to_async_url(url))
+    statements = [0]
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count(*_):
+        statements[0] += 1
+
+    async def grouped(session):
+        rows = (await session.exec(overall_rows_from(quiz_rows_from_results()))).all()
+        return [{"user_id": r[0], "average_score": round(r[-1], 2)} for r in rows]
+
+    async def first_page(session):
+        return await get_overall_leaderboard(Response(), cursor=None, limit=limit, session=session)
+
+    async def all_pages(session):
+        # Walk every keyset page, as a client following X-Next-Cursor would
+        rows, cursor = [], None
+        while True:
+            response = Response()
+            rows += await get_overall_leaderboard(response, cursor=cursor, limit=PAGE_SIZE_MAX, session=session)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                return rows
+
+    cases = (
+        ("legacy", legacy_overall),
+        ("grouped", grouped),
+        ("materialized", all_pages),
+        (f"materialized top {limit}", first_page),
+    )
+    outputs = {}
+    for name, run in cases:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            statements[0] = 0
+            start = time.perf_counter()
+            outputs[name] = await run(session)
+            elapsed = time.perf_counter() - start
+        print(f"{label:<9} {name:<21} {statements[0]:>6} queries  {elapsed * 1000:10.1f} ms  {len(outputs[name]):>6} rows")
+
+    # Same averages for every user (order within ties may differ)
+    legacy = {r["user_id"]: r["average_score"] for r in outputs["legacy"]}
+    for name in ("grouped", "materialized"):
+        other = {r["user_id"]: r["average_score"] for r in outputs[name]}
+        print(f"{label:<9} {name} matches legacy: {legacy == other}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--quizzes", type=int, default=1_000)
+    parser.add_argument("--per-user", type=int, default=20, help="Results per user")
+    parser.add_argument("--questions", type=int, default=10, help="Questions per quiz")
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        url = f"sqlite:///{path}"
+        seed(url, args.users, args.quizzes, args.per_user, args.questions)
+        asyncio.run(measure(url, "sqlite", args.limit))
+    finally:
+        os.remove(path)
+
+    pg_url = os.getenv("BENCH_DATABASE_URL")
+    if pg_url:
+        seed(pg_url, args.users, args.quizzes, args.per_user, args.questions)
+        asyncio.run(measure(pg_url, "postgres", args.limit))
+    else:
+        print("Set BENCH_DATABASE_URL to also benchmark Postgres.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# backend/benchmarks/bench_pdf_extract.py
+#
+# Compare the old in-memory extraction against the pooled extractor.
+# Run from backend/:  python -m benchmarks.bench_pdf_extract --pages 300 800
+#
+# Each variant runs in a fresh interpreter so its peak RSS is its own
+# (ru_maxrss is a process-lifetime high-water mark).
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import fitz
+
+from ai_code import pdf_extract
+
+LOREM = (
+    "Photosynthesis converts light energy into chemical energy stored in glucose. "
+    "Chlorophyll absorbs mostly blue and red light and reflects green. "
+) * 12
+
+PAGE_MARKER = re.compile(r"^Page \d+$", re.MULTILINE)
+
+VARIANTS = {
+    "legacy": "legacy (full read)",
+    "budget": f"pooled ({pdf_extract.DEFAULT_TEXT_BUDGET} char budget)",
+    "whole": "pooled (whole document)",
+}
+
+
+def build_pdf(pages: int) -> str:
+    """
+    Write a synthetic text-heavy PDF and return its path.
+    """
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), f"Page {i + 1}\n{LOREM}", fontsize=9)
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    os.close(fd)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KB on Linux; children covers the (reaped) pool workers
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) / 1024
+
+
+def legacy_extract(path: str) -> str:
+    with open(path, "rb") as f:
+        content = f.read()
+    doc = fitz.open(stream=content, filetype="pdf")
+    return "".join(page.get_text() for page in doc)
+
+
+def run_variant(variant: str, path: str) -> dict:
+    """
+    Time one extraction. Pages are counted from the per-page markers in
+    the text actually extracted, not from the document's page count.
+    """
+    start = time.perf_counter()
+    if variant == "legacy":
+        text = legacy_extract(path)
+    elif variant == "budget":
+        text = asyncio.run(pdf_extract.extract_text(path))
+    else:
+        text = asyncio.run(pdf_extract.extract_text(path, budget=None))
+    elapsed = time.perf_counter() - start
+
+    # Reap the pool workers so RUSAGE_CHILDREN includes them
+    pdf_extract.get_executor().shutdown(wait=True)
+    return {"pages": len(PAGE_MARKER.findall(text)), "elapsed": elapsed, "peak_rss_mb": peak_rss_mb()}
+
+
+def measure(variant: str, path: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pdf_extract", "--run-variant", variant, "--path", path],
+        check=True, capture_output=True, text=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[300, 800])
+    parser.add_argument("--run-variant", choices=list(VARIANTS), help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_variant:
+        print(json.dumps(run_variant(args.run_variant, args.path)))
+        return
+
+    for pages in args.pages:
+        path = build_pdf(pages)
+        try:
+            print(f"--- {pages}-page document")
+            for variant, label in VARIANTS.items():
+                r = measure(variant, path)
+                print(f"{label:<28} {r['pages']:>5} pages extracted  {r['elapsed'] * 1000:9.1f} ms  "
+                      f"{r['pages'] / r['elapsed']:10.1f} pages/s  peak RSS {r['peak_rss_mb']:7.1f} MB")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
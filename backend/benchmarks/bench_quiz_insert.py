@@ -0,0 +1,109 @@
+# backend/benchmarks/bench_quiz_insert.py
+#
+# Rows/sec for the old per-question insert path vs the single-transaction
+# bulk path. Run from backend/:
+#   python -m benchmarks.bench_quiz_insert
+#   BENCH_DATABASE_URL=postgresql://... python -m benchmarks.bench_quiz_insert
+# The Postgres run creates tables in the target database; point it at a scratch DB.
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import Quiz, Question, User
+from database import to_async_url
+from ai_code.quiz_store import save_quiz_with_questions
+
+
+def sample_questions(n: int) -> list:
+    return [
+        {
+            "question": f"Which statement about topic {i} is correct?",
+            "options": [f"Option {c} for {i}" for c in "ABCD"],
+            "correct_option": i % 4,
+        }
+        for i in range(n)
+    ]
+
+
+async def legacy_insert(session: AsyncSession, creator_id: str, questions: list):
+    # Mirrors the original generate_quiz persistence: quiz commit, refresh, one add per question
+    quiz = Quiz(quiz_name=f"legacy-{uuid.uuid4()}", max_users=10, creator_id=creator_id)
+    session.add(quiz)
+    await session.commit()
+    await session.refresh(quiz)
+    for q in questions:
+        session.add(Question(
+            quiz_id=quiz.quiz_id,
+            question_text=q["question"],
+            option_a=q["options"][0],
+            option_b=q["options"][1],
+            option_c=q["options"][2],
+            option_d=q["options"][3],
+            correct_index=q["correct_option"],
+        ))
+    await session.commit()
+
+
+async def bulk_insert(session: AsyncSession, creator_id: str, questions: list):
+    await save_quiz_with_questions(
+        session, f"bulk-{uuid.uuid4()}", 10, creator_id, "medium", 10, questions
+    )
+
+
+async def run(label: str, url: str, quizzes: int, per_quiz: int):
+    # Both strategies share one async engine (the API's driver), created and
+    # warmed before either timer starts, so only the insert strategy differs
+    engine = create_async_engine(to_async_url(url))
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    questions = sample_questions(per_quiz)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        creator = User(username="bench", email=f"{uuid.uuid4()}@bench.local", hashed_password="x")
+        session.add(creator)
+        await session.commit()
+        creator_id = creator.user_id
+
+    rows = quizzes * (per_quiz + 1)
+
+    for name, insert in (("legacy", legacy_insert), ("bulk", bulk_insert)):
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            start = time.perf_counter()
+            for _ in range(quizzes):
+                await insert(session, creator_id, questions)
+            elapsed = time.perf_counter() - start
+        print(f"{label:<9} {name:<7} {rows:>7} rows  {elapsed * 1000:9.1f} ms  {rows / elapsed:10.1f} rows/s")
+
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--quizzes", type=int, default=50)
+    parser.add_argument("--questions", type=int, default=50)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        asyncio.run(run("sqlite", f"sqlite:///{path}", args.quizzes, args.questions))
+    finally:
+        os.remove(path)
+
+    pg_url = os.getenv("BENCH_DATABASE_URL")
+    if pg_url:
+        asyncio.run(run("postgres", pg_url, args.quizzes, args.questions))
+    else:
+        print("Set BENCH_DATABASE_URL to also benchmark Postgres.")
+
+
+if __name__ == "__main__":
+    main()
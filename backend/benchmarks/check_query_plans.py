@@ -0,0 +1,218 @@
+# backend/benchmarks/check_query_plans.py
+#
+# Query-plan regression check: seeds a database with ~100k quiz results
+# and asserts every hot route query is answered from an index rather than
+# a full table scan, and that keyset pages seek on their cursor column. The statements come from the same builders the
+# routes call, so the check cannot drift from what is actually served.
+# Exits non-zero on any regression. Run from backend/:
+#   python -m benchmarks.check_query_plans
+#   BENCH_DATABASE_URL=postgresql://... python -m benchmarks.check_query_plans
+# The Postgres run creates tables in the target database; point it at a scratch DB.
+
+import os
+import re
+import sys
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import insert, text
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from models import User, Quiz, Question, UserQuiz, QuizResult, Answer, UserBadge
+from leaderboard_store import rebuild
+from pagination import PAGE_SIZE_DEFAULT
+from auth import login_user_query
+from ai_code.quiz import quiz_name_query
+from getquiz import quiz_query, quiz_questions_query, existing_result_query
+from principal import principal_query
+from results import quiz_start_query, scoring_questions_query
+from explanations import user_answers_query
+from leaderboard import quiz_leaderboard_query, overall_leaderboard_query
+from badges import badge_filters, badges_page_query
+from rank_index import quiz_changes_query, overall_changes_query
+
+USERS = 2000
+QUIZZES = 50            # USERS * QUIZZES quiz results
+QUESTIONS_PER_QUIZ = 10
+
+# Postgres rightly seq-scans tiny tables; only bigger ones count as regressions
+PG_SEQ_SCAN_MIN_ROWS = 1000
+
+# Keyset pages must bound the cursor's leading column inside the index seek;
+# filtering it after the seek re-reads every earlier page
+KEYSET_SEEKS = {
+    "leaderboard per quiz keyset page": "score",
+    "leaderboard overall keyset page": "average_score",
+    "badges keyset page": "awarded_at",
+}
+
+
+def seed(engine) -> dict:
+    now = datetime.now()
+    tag = uuid.uuid4().hex[:8]  # lets repeated runs share a scratch database
+    user_ids = [str(uuid.uuid4()) for _ in range(USERS)]
+    quiz_ids = [str(uuid.uuid4()) for _ in range(QUIZZES)]
+
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"user_id": uid, "username": f"user{i}-{tag}", "email": f"user{i}-{tag}@example.com",
+             "hashed_password": "x"}
+            for i, uid in enumerate(user_ids)
+        ])
+        session.execute(insert(Quiz), [
+            {"quiz_id": qid, "quiz_name": f"quiz{i}-{tag}", "max_users": USERS, "participants_attempted": USERS,
+             "question_count": QUESTIONS_PER_QUIZ,
+             "creator_id": user_ids[0], "created_at": now, "difficulty": "medium"}
+            for i, qid in enumerate(quiz_ids)
+        ])
+        session.execute(insert(Question), [
+            {"quiz_id": qid, "question_text": f"q{n}", "option_a": "a", "option_b": "b",
+             "option_c": "c", "option_d": "d", "correct_index": n % 4}
+            for qid in quiz_ids for n in range(QUESTIONS_PER_QUIZ)
+        ])
+        for qid in quiz_ids:
+            session.execute(insert(UserQuiz), [
+                {"user_id": uid, "quiz_id": qid, "started_at": now} for uid in user_ids
+            ])
+            session.execute(insert(QuizResult), [
+                {"user_id": uid, "quiz_id": qid, "score": i % (QUESTIONS_PER_QUIZ + 1),
+                 "accuracy": 0.0, "time_taken": i % 30, "finished_at": now}
+                for i, uid in enumerate(user_ids)
+            ])
+            session.execute(insert(UserBadge), [
+                {"user_id": uid, "quiz_id": qid, "badge_name": "Participant", "scope": "per_quiz",
+                 "awarded_at": now - timedelta(minutes=i)}
+                for i, uid in enumerate(user_ids)
+            ])
+        question_ids = session.exec(select(Question.id).where(Question.quiz_id == quiz_ids[0])).all()
+        session.execute(insert(Answer), [
+            {"user_id": uid, "quiz_id": quiz_ids[0], "question_id": question_id, "selected_index": 0,
+             "submitted_at": now}
+            for uid in user_ids for question_id in question_ids
+        ])
+        session.commit()
+        rebuild(session)
+        session.execute(text("ANALYZE"))
+        session.commit()
+
+    return {
+        "user_id": user_ids[USERS // 2],
+        "quiz_id": quiz_ids[QUIZZES // 2],
+        "login": f"user5-{tag}",
+        "quiz_name": f"quiz7-{tag}",
+        "recent": now + timedelta(minutes=5),  # a sync window that holds no rows yet
+    }
+
+
+def hot_queries(probe: dict) -> dict:
+    user_id, quiz_id = probe["user_id"], probe["quiz_id"]
+    limit = PAGE_SIZE_DEFAULT
+    return {
+        "auth.login": login_user_query(probe["login"]),
+        "quiz.generate_quiz name check": quiz_name_query(probe["quiz_name"]),
+        "principal user lookup": principal_query(user_id),
+        "getquiz quiz lookup": quiz_query(quiz_id),
+        "getquiz questions": quiz_questions_query(quiz_id),
+        "getquiz reattempt check": existing_result_query(quiz_id, user_id),
+        "results start info": quiz_start_query(user_id, quiz_id),
+        "results scoring questions": scoring_questions_query(quiz_id),
+        "explanations answers": user_answers_query(quiz_id, user_id),
+        "leaderboard per quiz": quiz_leaderboard_query(quiz_id, limit),
+        "leaderboard per quiz keyset page": quiz_leaderboard_query(quiz_id, limit, [5, 10, user_id]),
+        "leaderboard overall": overall_leaderboard_query(limit),
+        "leaderboard overall keyset page": overall_leaderboard_query(limit, [50.0, user_id]),
+        "badges by user": badges_page_query(badge_filters(user_id), limit),
+        "badges by user and scope": badges_page_query(badge_filters(user_id, scope="per_quiz"), limit),
+        "badges keyset page": badges_page_query(badge_filters(user_id), limit, (datetime(2030, 1, 1), 1000)),
+        "rank index sync (per quiz)": quiz_changes_query(probe["recent"]),
+        "rank index sync (overall)": overall_changes_query(probe["recent"]),
+    }
+
+
+# -----------------------------
+# 🔎 PLAN INSPECTION
+# -----------------------------
+def sqlite_plan(conn, sql: str, seek: Optional[str] = None):
+    details = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()]
+    scans = [d for d in details if d.startswith("SCAN") and "USING" not in d]
+    # e.g. "SEARCH quizleaderboard USING INDEX ix_quizleaderboard_rank (quiz_id=? AND score<?)"
+    seeks = not seek or any(re.search(rf"\(.*\b{seek}[<>]", d) for d in details if d.startswith("SEARCH"))
+    return bool(details) and not scans and seeks, details
+
+
+def postgres_plan(conn, sql: str, table_rows: dict, seek: Optional[str] = None):
+    plan = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+    nodes, stack = [], [plan[0]["Plan"]]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.get("Plans", []))
+
+    ok = True
+    seeks = not seek
+    details = []
+    for node in nodes:
+        relation = node.get("Relation Name")
+        if not relation:
+            continue
+        details.append(f"{node['Node Type']} on {relation}" + (f" using {node['Index Name']}" if "Index Name" in node else ""))
+        if node["Node Type"] == "Seq Scan" and table_rows.get(relation, 0) >= PG_SEQ_SCAN_MIN_ROWS:
+            ok = False
+        cond = node.get("Index Cond", "")
+        if cond:
+            details.append(f"cond {cond}")
+            # e.g. "((quiz_id = '...'::text) AND (score <= 5))"
+            seeks = seeks or bool(seek and re.search(rf"\b{seek} [<>]", cond))
+    return ok and seeks and bool(details), details
+
+
+def check(label: str, url: str) -> int:
+    engine = create_engine(url)
+    failures = 0
+    try:
+        SQLModel.metadata.create_all(engine)
+        print(f"[{label}] Seeding {USERS * QUIZZES} results...")
+        probe = seed(engine)
+
+        with engine.connect() as conn:
+            table_rows = {}
+            if engine.dialect.name == "postgresql":
+                table_rows = dict(conn.execute(text(
+                    "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+                )).all())
+
+            for name, query in hot_queries(probe).items():
+                sql = str(query.compile(engine, compile_kwargs={"literal_binds": True}))
+                seek = KEYSET_SEEKS.get(name)
+                if engine.dialect.name == "postgresql":
+                    ok, details = postgres_plan(conn, sql, table_rows, seek)
+                else:
+                    ok, details = sqlite_plan(conn, sql, seek)
+                failures += not ok
+                print(f"{'OK  ' if ok else 'FAIL'} [{label}] {name}: {' | '.join(details)}")
+    finally:
+        engine.dispose()
+    return failures
+
+
+def main() -> int:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        failures = check("sqlite", f"sqlite:///{path}")
+    finally:
+        os.remove(path)
+
+    pg_url = os.getenv("BENCH_DATABASE_URL")
+    if pg_url:
+        failures += check("postgres", pg_url)
+    else:
+        print("Set BENCH_DATABASE_URL to also check Postgres plans.")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
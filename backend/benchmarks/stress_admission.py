@@ -0,0 +1,114 @@
+# backend/benchmarks/stress_admission.py
+#
+# Concurrency stress test for quiz admission: fires hundreds of
+# simultaneous starts at a nearly full quiz and checks it never overfills.
+# Run from backend/:
+#   python -m benchmarks.stress_admission
+#   BENCH_DATABASE_URL=postgresql://... python -m benchmarks.stress_admission
+# The Postgres run creates tables in the target database; point it at a scratch DB.
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import uuid
+from collections import Counter
+
+from fastapi import HTTPException
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, Session, create_engine, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from models import User, Quiz, UserQuiz, utc_now
+from database import to_async_url
+from getquiz import get_quiz_by_id
+
+
+async def admit_all(url: str, quiz_id: str, user_ids: list) -> Counter:
+    connect_args = {"timeout": 30} if url.startswith("sqlite") else {}
+    async_engine = create_async_engine(
+        to_async_url(url), pool_size=len(user_ids), max_overflow=0, connect_args=connect_args
+    )
+    # Every start waits on the gate so they really do overlap
+    gate = asyncio.Event()
+
+    async def start(uid: str) -> str:
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            await gate.wait()
+            try:
+                await get_quiz_by_id(quiz_id, uid, session, principal=None)
+                return "admitted"
+            except HTTPException as e:
+                return f"{e.status_code} {e.detail}"
+
+    tasks = [asyncio.create_task(start(uid)) for uid in user_ids]
+    await asyncio.sleep(0)
+    gate.set()
+    outcomes = Counter(await asyncio.gather(*tasks))
+    await async_engine.dispose()
+    return outcomes
+
+
+def run(url: str, starts: int, max_users: int, already_in: int) -> bool:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+
+    user_ids = [str(uuid.uuid4()) for _ in range(already_in + starts)]
+    with Session(engine) as session:
+        session.execute(insert(User), [
+            {"user_id": uid, "username": f"stress{i}", "email": f"{uid}@stress.local", "hashed_password": "x"}
+            for i, uid in enumerate(user_ids)
+        ])
+        quiz = Quiz(quiz_name=f"stress-{uuid.uuid4()}", max_users=max_users,
+                    participants_attempted=already_in, creator_id=user_ids[0])
+        session.add(quiz)
+        session.flush()
+        if already_in:
+            session.execute(insert(UserQuiz), [
+                {"user_id": uid, "quiz_id": quiz.quiz_id, "started_at": utc_now()}
+                for uid in user_ids[:already_in]
+            ])
+        session.commit()
+        quiz_id = quiz.quiz_id
+
+    outcomes = asyncio.run(admit_all(url, quiz_id, user_ids[already_in:]))
+
+    with Session(engine) as session:
+        counter = session.exec(select(Quiz.participants_attempted).where(Quiz.quiz_id == quiz_id)).one()
+        rows = session.exec(
+            select(func.count()).select_from(UserQuiz).where(UserQuiz.quiz_id == quiz_id)
+        ).one()
+    engine.dispose()
+
+    expected = max_users - already_in
+    ok = outcomes["admitted"] == expected and counter == max_users and rows == max_users
+    print(f"{url.split(':')[0]:<10} outcomes={dict(outcomes)}")
+    print(f"{'':<10} participants_attempted={counter} userquiz_rows={rows} max_users={max_users} -> {'OK' if ok else 'OVERFILLED/UNDERFILLED'}")
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--starts", type=int, default=300)
+    parser.add_argument("--max-users", type=int, default=100)
+    parser.add_argument("--already-in", type=int, default=95)
+    args = parser.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        ok = run(f"sqlite:///{path}", args.starts, args.max_users, args.already_in)
+    finally:
+        os.remove(path)
+
+    pg_url = os.getenv("BENCH_DATABASE_URL")
+    if pg_url:
+        ok = run(pg_url, args.starts, args.max_users, args.already_in) and ok
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
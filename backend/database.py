@@ -1,8 +1,13 @@
 # backend/database.py
 
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from dotenv import load_dotenv
 import os
+import time
 
 # Load environment variables from .env
 load_dotenv()
@@ -10,13 +15,144 @@ load_dotenv()
 # PostgreSQL connection string stored in .env
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-# Create the database engine
-engine = create_engine(DATABASE_URL, echo=True)
+# -----------------------------
+# ⚙️ Engine / pool settings
+# -----------------------------
+SQL_ECHO = os.getenv("SQL_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))        # seconds to wait for a connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))      # seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+def _new_wait_counters() -> dict:
+    return {"checkouts": 0, "timeouts": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0}
+
+
+class _WaitTimingMixin:
+    """
+    Records how long each pool checkout waited for a connection.
+    """
+    wait_counters: dict
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.wait_counters["timeouts"] += 1
+            raise
+        finally:
+            waited = (time.perf_counter() - start) * 1000
+            self.wait_counters["checkouts"] += 1
+            self.wait_counters["total_wait_ms"] += waited
+            self.wait_counters["max_wait_ms"] = max(self.wait_counters["max_wait_ms"], waited)
+
+
+class InstrumentedQueuePool(_WaitTimingMixin, QueuePool):
+    wait_counters = _new_wait_counters()
+
+
+class InstrumentedAsyncPool(_WaitTimingMixin, AsyncAdaptedQueuePool):
+    wait_counters = _new_wait_counters()
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    return ":memory:" in url or url.split("?")[0].endswith("://")
+
+
+def _engine_kwargs(url: str, poolclass) -> dict:
+    kwargs = {"echo": SQL_ECHO, "pool_pre_ping": DB_POOL_PRE_PING}
+    if url.startswith("sqlite"):
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            poolclass=poolclass,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+    return kwargs
+
+
+def build_engine(url: str):
+    return create_engine(url, **_engine_kwargs(url, InstrumentedQueuePool))
+
+
+def to_async_url(url: str) -> str:
+    """
+    Swap the sync driver for its async counterpart (asyncpg / aiosqlite).
+    """
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+")[0]
+    if dialect in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    if dialect == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def build_async_engine(url: str):
+    async_url = to_async_url(url)
+    return create_async_engine(async_url, **_engine_kwargs(async_url, InstrumentedAsyncPool))
+
+
+# Async engine serves the API; the sync engine is for background threads,
+# table creation and scripts. Both share the settings above.
+engine = build_engine(DATABASE_URL)
+async_engine = build_async_engine(DATABASE_URL)
+async_session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
 
 # Function to create all tables from models
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
 
-# Dependency to get DB session
+# Sync session (background threads, scripts); always closed when done
 def get_session():
-    return Session(engine)
+    with Session(engine) as session:
+        yield session
+
+# Dependency to get an async DB session; always closed when the request finishes
+async def get_async_session():
+    async with async_session_factory() as session:
+        yield session
+
+def _pool_stats(pool) -> dict:
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=pool.overflow(),
+            max_overflow=DB_MAX_OVERFLOW,
+        )
+    counters = getattr(pool, "wait_counters", None)
+    if counters:
+        checkouts = counters["checkouts"]
+        stats.update(
+            checkouts=checkouts,
+            timeouts=counters["timeouts"],
+            avg_wait_ms=round(counters["total_wait_ms"] / checkouts, 3) if checkouts else 0.0,
+            max_wait_ms=round(counters["max_wait_ms"], 3),
+        )
+    return stats
+
+def pool_stats() -> dict:
+    return {
+        "async": _pool_stats(async_engine.sync_engine.pool),
+        "sync": _pool_stats(engine.pool),
+    }
+
+# Dialect-specific INSERT that supports ON CONFLICT (Postgres and SQLite);
+# works with both Session and AsyncSession
+def dialect_insert(session):
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"ON CONFLICT inserts are not supported on {dialect}")
+    return insert
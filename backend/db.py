@@ -1,17 +0,0 @@
-# db.py
-from sqlmodel import SQLModel, create_engine, Session
-import os
-from dotenv import load_dotenv
-
-load_dotenv()
-
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_engine(DATABASE_URL, echo=True)
-
-def get_session():
-    with Session(engine) as session:
-        yield session
-
-def init_db():
-    from models import User, Quiz, Question, Submission  # Import all your models here
-    SQLModel.metadata.create_all(engine)
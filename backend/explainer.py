@@ -0,0 +1,134 @@
+# backend/explainer.py
+
+import asyncio
+import json
+import os
+import re
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from models import Question
+from llm_client import chat
+
+# ⚙️ Fan-out settings (override via environment)
+EXPLAIN_CONCURRENCY = int(os.getenv("EXPLAIN_CONCURRENCY", 6))
+EXPLAIN_BATCH_SIZE = int(os.getenv("EXPLAIN_BATCH_SIZE", 5))  # 1 = one LLM call per question
+
+# (question, explanation or None, error message or None)
+ExplanationResult = Tuple[Question, Optional[str], Optional[str]]
+
+
+def index_to_letter(index):
+    return ["A", "B", "C", "D"][index] if index is not None and 0 <= index <= 3 else None
+
+
+def build_explanation_prompt(q: Question) -> str:
+    # Depends only on the question, never on the user, so the result is shareable
+    return (
+        f"Explain why the correct answer is {index_to_letter(q.correct_index)} for this MCQ:\n\n"
+        f"Question: {q.question_text}\n"
+        f"Options:\n"
+        f"A. {q.option_a}\n"
+        f"B. {q.option_b}\n"
+        f"C. {q.option_c}\n"
+        f"D. {q.option_d}\n"
+    )
+
+
+def build_batch_prompt(questions: List[Question]) -> str:
+    blocks = []
+    for number, q in enumerate(questions, start=1):
+        blocks.append(
+            f"[{number}] Question: {q.question_text}\n"
+            f"A. {q.option_a}\nB. {q.option_b}\nC. {q.option_c}\nD. {q.option_d}\n"
+            f"Correct answer: {index_to_letter(q.correct_index)}"
+        )
+    return (
+        "For each multiple-choice question below, explain why the given correct answer is right.\n"
+        "Return only a JSON array of objects with:\n"
+        "- `id`: the question number in brackets\n"
+        "- `explanation`: string\n\n"
+        + "\n\n".join(blocks)
+    )
+
+
+def parse_batch_reply(content: str, count: int) -> Dict[int, str]:
+    """
+    Map 1-based question numbers to explanations. Items that are missing,
+    out of range or malformed are simply left out.
+    """
+    match = re.search(r"\[.*\]", content, re.DOTALL)
+    if not match:
+        return {}
+    try:
+        items = json.loads(match.group(0))
+    except ValueError:
+        return {}
+
+    parsed = {}
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            number = int(item.get("id"))
+        except (TypeError, ValueError):
+            continue
+        text = item.get("explanation")
+        if 1 <= number <= count and isinstance(text, str) and text.strip():
+            parsed[number] = text.strip()
+    return parsed
+
+
+async def explain_one(q: Question, semaphore: asyncio.Semaphore) -> ExplanationResult:
+    async with semaphore:
+        try:
+            return q, await chat(build_explanation_prompt(q)), None
+        except Exception as e:
+            return q, None, f"Explanation not available due to error: {e}"
+
+
+async def explain_batch(questions: List[Question], semaphore: asyncio.Semaphore) -> List[ExplanationResult]:
+    """
+    One structured call for several questions; anything that fails to
+    parse falls back to its own per-question call.
+    """
+    if len(questions) == 1:
+        return [await explain_one(questions[0], semaphore)]
+
+    async with semaphore:
+        try:
+            parsed = parse_batch_reply(await chat(build_batch_prompt(questions)), len(questions))
+        except Exception:
+            parsed = {}
+
+    results = [(q, parsed[n], None) for n, q in enumerate(questions, start=1) if n in parsed]
+    leftovers = [q for n, q in enumerate(questions, start=1) if n not in parsed]
+    results += await asyncio.gather(*(explain_one(q, semaphore) for q in leftovers))
+    return results
+
+
+async def iter_explanations(
+    questions: List[Question],
+    batch_size: int = EXPLAIN_BATCH_SIZE,
+    concurrency: int = EXPLAIN_CONCURRENCY,
+) -> AsyncIterator[ExplanationResult]:
+    """
+    Explain questions with at most `concurrency` LLM calls in flight,
+    yielding each result as soon as its batch completes.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    size = max(1, batch_size)
+    tasks = [
+        asyncio.ensure_future(explain_batch(questions[i:i + size], semaphore))
+        for i in range(0, len(questions), size)
+    ]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            for result in await finished:
+                yield result
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def explain_questions(questions: List[Question], **kwargs) -> List[ExplanationResult]:
+    return [result async for result in iter_explanations(questions, **kwargs)]
@@ -1,86 +1,156 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from database import get_session
-from models import Quiz, Question, User, Answer
-import requests
+from fastapi import APIRouter, Depends, HTTPException, Form, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session, async_session_factory
+from models import Quiz, Question, Answer
+from principal import Principal, get_current_principal, get_optional_principal, resolve_user
+from getquiz import invalidate_quiz_content
+from explainer import explain_questions, iter_explanations, index_to_letter
+from collections import deque
+from typing import Optional
+import asyncio, json, os, time
 
 router = APIRouter()
 
-# 🔐 OpenRouter config
-OPENROUTER_API_KEY = "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"
-OPENROUTER_URL = "https://openrouter.ai/api/v1/chat/completions"
-MODEL_NAME = "deepseek/deepseek-r1-0528-qwen3-8b:free"
+# ⏱️ Time-to-first-explanation samples (seconds) for streamed requests
+ttfe_samples = deque(maxlen=1000)
+stream_counters = {"streams": 0}
 
-# Helper to convert index to letter
-def index_to_letter(index):
-    return ["A", "B", "C", "D"][index] if index is not None and 0 <= index <= 3 else None
+def record_time_to_first(started: float):
+    stream_counters["streams"] += 1
+    ttfe_samples.append(time.perf_counter() - started)
 
-@router.get("/explanations/{quiz_id}/{user_id}")
-def get_explanations(quiz_id: str, user_id: str, session: Session = Depends(get_session)):
+async def fill_missing_explanations(session: AsyncSession, questions: list) -> dict:
+    """
+    Generate explanations for questions that have none stored yet and persist them.
+    Returns {question_id: error message} for any that failed; failures are not stored.
+    """
+    missing = [q for q in questions if not q.explanation]
+    if not missing:
+        return {}
+
+    errors = {}
+    for q, explanation, error in await explain_questions(missing):
+        if explanation:
+            q.explanation = explanation
+            session.add(q)
+        else:
+            errors[q.id] = error
+
+    if len(errors) < len(missing):
+        await session.commit()
+    return errors
+
+# -----------------------------
+# 🌙 BACKGROUND PRECOMPUTATION
+# -----------------------------
+PRECOMPUTE_CONCURRENCY = int(os.getenv("EXPLAIN_PRECOMPUTE_CONCURRENCY", 2))
+
+# One quiz at a time, with few calls in flight, so live requests keep priority
+_precompute_slot = asyncio.Semaphore(1)
+_precompute_tasks = set()
+
+async def precompute_explanations(quiz_id: str):
+    """
+    Generate and store explanations for every question of a new quiz.
+    """
+    async with _precompute_slot:
+        async with async_session_factory() as session:
+            missing = (await session.exec(
+                select(Question).where(Question.quiz_id == quiz_id, Question.explanation.is_(None))
+            )).all()
+            results = await explain_questions(missing, concurrency=PRECOMPUTE_CONCURRENCY)
+
+            for q, explanation, error in results:
+                if not explanation:
+                    print(f"⚠️ Precompute failed for question {q.id}: {error}")
+                    continue
+                # Leave alone anything a live request stored in the meantime
+                await session.execute(
+                    update(Question)
+                    .where(Question.id == q.id, Question.explanation.is_(None))
+                    .values(explanation=explanation)
+                )
+            await session.commit()
+
+def schedule_precompute(quiz_id: str):
+    """
+    Fire-and-forget precomputation; keeps a reference so the task isn't GC'd.
+    """
+    task = asyncio.create_task(precompute_explanations(quiz_id))
+    _precompute_tasks.add(task)
+    task.add_done_callback(_precompute_tasks.discard)
+
+async def get_quiz_for_creator(session: AsyncSession, quiz_id: str, user_id: str) -> Quiz:
+    quiz = (await session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id))).first()
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
+    if quiz.creator_id != user_id:
+        raise HTTPException(status_code=403, detail="Only the quiz creator can manage explanations.")
+    return quiz
+
+def select_quiz_questions(quiz_id: str, question_id: Optional[int] = None):
+    query = select(Question).where(Question.quiz_id == quiz_id)
+    if question_id is not None:
+        query = query.where(Question.id == question_id)
+    return query
+
+def build_explanation_record(q: Question, user_index: Optional[int], explanation: Optional[str]) -> dict:
+    return {
+        "question": q.question_text,
+        "options": [q.option_a, q.option_b, q.option_c, q.option_d],
+        "correct_index": q.correct_index,
+        "correct_option": index_to_letter(q.correct_index),
+        "user_index": user_index,
+        "user_option": index_to_letter(user_index),
+        "is_correct": user_index == q.correct_index,
+        "explanation": explanation
+    }
+
+def user_answers_query(quiz_id: str, user_id: str):
+    return select(Answer).where(Answer.quiz_id == quiz_id, Answer.user_id == user_id)
+
+async def load_explanation_context(
+    session: AsyncSession, quiz_id: str, user_id: str, principal: Optional[Principal] = None
+):
+    """
+    Validate quiz and user, then load the quiz questions and the user's answers.
+    """
     # 🎯 Validate quiz and user
-    quiz = session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id)).first()
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
-    if not quiz or not user:
+    quiz = (await session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id))).first()
+    if not quiz:
         raise HTTPException(status_code=404, detail="Quiz or user not found")
+    user = await resolve_user(session, user_id, principal)
 
     # ❓ Fetch questions
-    questions = session.exec(select(Question).where(Question.quiz_id == quiz.quiz_id)).all()
+    questions = (await session.exec(select(Question).where(Question.quiz_id == quiz.quiz_id))).all()
     if not questions:
         raise HTTPException(status_code=404, detail="No questions found for this quiz")
 
     # ✅ Fetch user's answers
-    answers = session.exec(
-        select(Answer).where(
-            Answer.quiz_id == quiz_id,
-            Answer.user_id == user_id
-        )
-    ).all()
+    answers = (await session.exec(user_answers_query(quiz_id, user_id))).all()
     user_answers = {ans.question_id: ans.selected_index for ans in answers}
 
-    # 📘 Generate explanations
-    explanation_data = []
-    for q in questions:
-        correct_index = q.correct_index
-        user_index = user_answers.get(q.id)
-        is_correct = user_index == correct_index
-
-        prompt = (
-            f"Explain why the correct answer is {index_to_letter(correct_index)} for this MCQ:\n\n"
-            f"Question: {q.question_text}\n"
-            f"Options:\n"
-            f"A. {q.option_a}\n"
-            f"B. {q.option_b}\n"
-            f"C. {q.option_c}\n"
-            f"D. {q.option_d}\n"
-        )
-
-        try:
-            res = requests.post(
-                OPENROUTER_URL,
-                headers={
-                    "Authorization": f"Bearer {OPENROUTER_API_KEY}",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model": MODEL_NAME,
-                    "messages": [{"role": "user", "content": prompt}]
-                }
-            )
-            res.raise_for_status()
-            explanation = res.json()["choices"][0]["message"]["content"]
-        except Exception as e:
-            explanation = f"Explanation not available due to error: {e}"
-
-        explanation_data.append({
-            "question": q.question_text,
-            "options": [q.option_a, q.option_b, q.option_c, q.option_d],
-            "correct_index": correct_index,
-            "correct_option": index_to_letter(correct_index),
-            "user_index": user_index,
-            "user_option": index_to_letter(user_index),
-            "is_correct": is_correct,
-            "explanation": explanation
-        })
+    return quiz, user, questions, user_answers
+
+@router.get("/explanations/{quiz_id}/{user_id}")
+async def get_explanations(
+    quiz_id: str,
+    user_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    principal: Optional[Principal] = Depends(get_optional_principal)
+):
+    quiz, user, questions, user_answers = await load_explanation_context(session, quiz_id, user_id, principal)
+
+    # 📘 Serve stored explanations; generate (once) only the missing ones
+    errors = await fill_missing_explanations(session, questions)
+
+    explanation_data = [
+        build_explanation_record(q, user_answers.get(q.id), q.explanation or errors.get(q.id))
+        for q in questions
+    ]
 
     return {
         "quiz_id": quiz.quiz_id,
@@ -88,3 +158,121 @@ def get_explanations(quiz_id: str, user_id: str, session: Session = Depends(get_
         "user_id": user.user_id,
         "explanations": explanation_data
     }
+
+@router.get("/explanations/{quiz_id}/{user_id}/stream")
+async def stream_explanations(
+    quiz_id: str,
+    user_id: str,
+    format: str = Query("ndjson", description="'ndjson' or 'sse'"),
+    session: AsyncSession = Depends(get_async_session),
+    principal: Optional[Principal] = Depends(get_optional_principal)
+):
+    """
+    📡 Stream one explanation record per line as soon as it is ready:
+    stored explanations first, then freshly generated ones as they finish.
+    """
+    if format not in ("ndjson", "sse"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'sse'")
+
+    _, _, questions, user_answers = await load_explanation_context(session, quiz_id, user_id, principal)
+    # Detach plain data up front; the stream outlives the request session
+    stored = [(q, q.explanation) for q in questions if q.explanation]
+    missing = [q for q in questions if not q.explanation]
+    started = time.perf_counter()
+
+    def encode(record: dict) -> str:
+        line = json.dumps(record)
+        return f"data: {line}\n\n" if format == "sse" else line + "\n"
+
+    async def records():
+        first_sent = False
+        for q, explanation in stored:
+            if not first_sent:
+                record_time_to_first(started)
+                first_sent = True
+            yield encode(build_explanation_record(q, user_answers.get(q.id), explanation))
+
+        async with async_session_factory() as write_session:
+            async for q, explanation, error in iter_explanations(missing):
+                if explanation:
+                    await write_session.execute(
+                        update(Question).where(Question.id == q.id).values(explanation=explanation)
+                    )
+                    await write_session.commit()
+                if not first_sent:
+                    record_time_to_first(started)
+                    first_sent = True
+                yield encode(build_explanation_record(q, user_answers.get(q.id), explanation or error))
+
+        if format == "sse":
+            yield "event: done\ndata: {}\n\n"
+
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(records(), media_type=media_type)
+
+@router.get("/metrics")
+def get_explanation_metrics():
+    """
+    ⏱️ Time-to-first-explanation for streamed explanation requests.
+    """
+    samples = sorted(ttfe_samples)
+    return {
+        "streams": stream_counters["streams"],
+        "ttfe_avg_ms": round(sum(samples) / len(samples) * 1000, 1) if samples else None,
+        "ttfe_p95_ms": (
+            round(samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1)
+            if samples else None
+        ),
+    }
+
+# -----------------------------
+# 🛠️ CREATOR TOOLS
+# -----------------------------
+@router.delete("/explanations/{quiz_id}")
+async def invalidate_explanations(
+    quiz_id: str,
+    question_id: Optional[int] = Query(None, description="Only clear this question (optional)"),
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    🧹 Clear stored explanations so they are regenerated on next view.
+    Requires the quiz creator's bearer token.
+    """
+    quiz = await get_quiz_for_creator(session, quiz_id, principal.user_id)
+    questions = (await session.exec(select_quiz_questions(quiz.quiz_id, question_id))).all()
+
+    for q in questions:
+        q.explanation = None
+        session.add(q)
+    await session.commit()
+    invalidate_quiz_content(quiz.quiz_id)
+
+    return {"quiz_id": quiz.quiz_id, "cleared": len(questions)}
+
+@router.post("/explanations/{quiz_id}/regenerate")
+async def regenerate_explanations(
+    quiz_id: str,
+    question_id: Optional[int] = Form(None),
+    session: AsyncSession = Depends(get_async_session),
+    principal: Principal = Depends(get_current_principal)
+):
+    """
+    🔁 Clear and immediately regenerate stored explanations.
+    Requires the quiz creator's bearer token.
+    """
+    quiz = await get_quiz_for_creator(session, quiz_id, principal.user_id)
+    questions = (await session.exec(select_quiz_questions(quiz.quiz_id, question_id))).all()
+
+    for q in questions:
+        q.explanation = None
+        session.add(q)
+    await session.commit()
+    invalidate_quiz_content(quiz.quiz_id)
+    errors = await fill_missing_explanations(session, questions)
+
+    return {
+        "quiz_id": quiz.quiz_id,
+        "regenerated": len(questions) - len(errors),
+        "failed": list(errors),
+    }
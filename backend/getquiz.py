@@ -1,54 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import Session, select
-from database import get_session
-from models import Quiz, Question, UserQuiz, User, QuizResult
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import update
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session, dialect_insert
+from models import Quiz, Question, UserQuiz, QuizResult, utc_now
+from cache import TTLCache
+from principal import Principal, get_optional_principal, resolve_user
+from typing import Optional
+import json, os
 
 router = APIRouter()
 
-@router.get("/get_quiz/{quiz_id}/{user_id}")
-def get_quiz_by_id(quiz_id: str, user_id: str, session: Session = Depends(get_session)):
-    # 🔍 Fetch the quiz
-    quiz = session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id)).first()
-    if not quiz:
-        raise HTTPException(status_code=404, detail="Quiz not found")
+# -----------------------------
+# 📦 QUIZ CONTENT CACHE
+# -----------------------------
+# Each worker keeps the serialized payload and only per-user admission
+# touches the database. Routes that edit or delete a quiz's questions call
+# invalidate_quiz_content; other workers' copies expire with the TTL.
+QUIZ_CACHE_MAX_ENTRIES = int(os.getenv("QUIZ_CACHE_MAX_ENTRIES", 256))
+QUIZ_CACHE_TTL_SECONDS = int(os.getenv("QUIZ_CACHE_TTL_SECONDS", 600))
 
-    # 🔍 Fetch the user
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+quiz_content_cache = TTLCache(QUIZ_CACHE_MAX_ENTRIES, QUIZ_CACHE_TTL_SECONDS)
 
-    # ⛔ Prevent reattempts
-    existing_result = session.exec(
-        select(QuizResult).where(
-            (QuizResult.quiz_id == quiz.quiz_id) & (QuizResult.user_id == user.user_id)
-        )
-    ).first()
-    if existing_result:
-        raise HTTPException(status_code=403, detail="You have already attempted this quiz.")
+def invalidate_quiz_content(quiz_id: str) -> bool:
+    """
+    Drop a quiz's cached payload; call after anything that edits its questions.
+    """
+    return quiz_content_cache.invalidate(quiz_id)
+
+def clear_quiz_content_cache():
+    quiz_content_cache.clear()
+
+def json_object(fields: dict, raw_fields: dict) -> str:
+    """
+    Serialize a JSON object member by member; values in raw_fields are
+    already JSON text and are embedded as-is.
+    """
+    members = [f"{json.dumps(k)}: {json.dumps(v)}" for k, v in fields.items()]
+    members += [f"{json.dumps(k)}: {v}" for k, v in raw_fields.items()]
+    return "{" + ", ".join(members) + "}"
+
+# Statement builders, shared with benchmarks/check_query_plans.py
+def quiz_query(quiz_id: str):
+    return select(Quiz).where(Quiz.quiz_id == quiz_id)
+
+def quiz_questions_query(quiz_id: str):
+    return select(Question).where(Question.quiz_id == quiz_id)
+
+def existing_result_query(quiz_id: str, user_id: str):
+    return select(QuizResult.id).where((QuizResult.quiz_id == quiz_id) & (QuizResult.user_id == user_id))
+
+async def load_quiz_content(session: AsyncSession, quiz_id: str) -> dict:
+    """
+    Fetch the quiz and its questions once; the question list is kept
+    serialized so cache hits skip re-encoding it.
+    """
+    quiz = (await session.exec(quiz_query(quiz_id))).first()
+    if not quiz:
+        raise HTTPException(status_code=404, detail="Quiz not found")
 
-    # 🚫 Max participants check
-    participant_count = session.exec(
-        select(UserQuiz).where(UserQuiz.quiz_id == quiz.quiz_id)
-    ).all()
-    if len(participant_count) >= quiz.max_users:
-        raise HTTPException(status_code=403, detail="Max participants limit reached.")
-
-    # ✅ Register user as participant if not already
-    existing_participant = session.exec(
-        select(UserQuiz).where(
-            (UserQuiz.quiz_id == quiz.quiz_id) & (UserQuiz.user_id == user.user_id)
-        )
-    ).first()
-    if not existing_participant:
-        session.add(UserQuiz(user_id=user.user_id, quiz_id=quiz.quiz_id))
-        quiz.participants_attempted += 1
-        session.add(quiz)
-        session.commit()
-
-    # 📋 Fetch all questions for this quiz
-    questions = session.exec(
-        select(Question).where(Question.quiz_id == quiz.quiz_id)
-    ).all()
+    questions = (await session.exec(quiz_questions_query(quiz.quiz_id))).all()
 
     # 🧾 Format question data with indexed IDs
     question_data = [
@@ -61,11 +72,82 @@ def get_quiz_by_id(quiz_id: str, user_id: str, session: Session = Depends(get_se
     ]
 
     return {
-        "quiz_id": quiz.quiz_id,
-        "quiz_name": quiz.quiz_name,
-        "difficulty": quiz.difficulty,
-        "duration_minutes": quiz.duration_minutes,
-        "max_users": quiz.max_users,
-        "participants_attempted": quiz.participants_attempted,
-        "questions": question_data
+        "quiz": {
+            "quiz_id": quiz.quiz_id,
+            "quiz_name": quiz.quiz_name,
+            "difficulty": quiz.difficulty,
+            "duration_minutes": quiz.duration_minutes,
+            "max_users": quiz.max_users,
+            "question_count": quiz.question_count,
+        },
+        "questions_json": json.dumps(question_data),
     }
+
+async def admit_participant(session: AsyncSession, quiz_id: str, user_id: str):
+    """
+    Register user_id as a participant of quiz_id without a read-then-write race.
+
+    The UserQuiz insert is a no-op for returning participants (unique
+    quiz_id/user_id). New participants bump participants_attempted with a
+    conditional UPDATE, which the database serialises per quiz row; if no
+    seat is left the whole admission is rolled back.
+    """
+    upsert = dialect_insert(session)
+    registered = (await session.execute(
+        upsert(UserQuiz)
+        .values(user_id=user_id, quiz_id=quiz_id, started_at=utc_now())
+        .on_conflict_do_nothing(index_elements=["quiz_id", "user_id"])
+    )).rowcount
+
+    if registered:
+        seated = (await session.execute(
+            update(Quiz)
+            .where(Quiz.quiz_id == quiz_id, Quiz.participants_attempted < Quiz.max_users)
+            .values(participants_attempted=Quiz.participants_attempted + 1)
+            .execution_options(synchronize_session=False)
+        )).rowcount
+        if not seated:
+            await session.rollback()
+            raise HTTPException(status_code=403, detail="Max participants limit reached.")
+
+    await session.commit()
+
+@router.get("/get_quiz/cache_stats")
+def get_quiz_cache_stats():
+    """
+    📦 Hit rate and size of the per-worker quiz content cache.
+    """
+    return quiz_content_cache.stats()
+
+@router.get("/get_quiz/{quiz_id}/{user_id}")
+async def get_quiz_by_id(
+    quiz_id: str,
+    user_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    principal: Optional[Principal] = Depends(get_optional_principal)
+):
+    # 🔍 Fetch the quiz content (cached; 404s if the quiz does not exist)
+    content = await quiz_content_cache.get_or_load(
+        quiz_id, lambda: load_quiz_content(session, quiz_id)
+    )
+
+    # 🔍 Resolve the user (from the bearer token or the principal cache)
+    user = await resolve_user(session, user_id, principal)
+
+    # ⛔ Prevent reattempts
+    existing_result = (await session.exec(existing_result_query(quiz_id, user.user_id))).first()
+    if existing_result:
+        raise HTTPException(status_code=403, detail="You have already attempted this quiz.")
+
+    # ✅ Admit the user atomically: register once, then take a seat only if one is free
+    await admit_participant(session, quiz_id, user.user_id)
+    participants_attempted = (await session.exec(
+        select(Quiz.participants_attempted).where(Quiz.quiz_id == quiz_id)
+    )).one()
+
+    # 🧾 Quiz fields plus the live count, with the pre-serialized questions
+    body = json_object(
+        {**content["quiz"], "participants_attempted": participants_attempted},
+        {"questions": content["questions_json"]},
+    )
+    return Response(content=body, media_type="application/json")
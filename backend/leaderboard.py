@@ -1,35 +1,86 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import select, Session, func
-from database import get_session
-from models import QuizResult, User, Quiz, Question
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import get_async_session
+from models import Quiz, QuizLeaderboard, OverallLeaderboard
+from rank_index import rank_registry, MAX_NEIGHBORS
+from pagination import page_size, decode_cursor, split_page, NEXT_CURSOR_HEADER
+from typing import Optional
 
 router = APIRouter()
 
 # -----------------------------
 # 📊 PER-QUIZ LEADERBOARD
 # -----------------------------
+QUIZ_CURSOR = "quiz_leaderboard"
+OVERALL_CURSOR = "overall_leaderboard"
+
+def quiz_leaderboard_query(quiz_id: str, limit: int, after: Optional[list] = None):
+    """
+    One page (plus one row) of the materialized leaderboard, in index order
+    (score desc, time asc, user_id); `after` is the previous page's last key.
+    """
+    query = (
+        select(QuizLeaderboard.username, QuizLeaderboard.user_id, QuizLeaderboard.score, QuizLeaderboard.time_taken)
+        .where(QuizLeaderboard.quiz_id == quiz_id)
+        .order_by(QuizLeaderboard.score.desc(), QuizLeaderboard.time_taken.asc(), QuizLeaderboard.user_id)
+        .limit(limit + 1)
+    )
+    if after:
+        score, time_taken, user_id = after
+        # The leading bound lets the index seek past earlier pages instead of filtering them
+        query = query.where(
+            QuizLeaderboard.score <= score,
+            (QuizLeaderboard.score < score)
+            | ((QuizLeaderboard.score == score) & (QuizLeaderboard.time_taken > time_taken))
+            | ((QuizLeaderboard.score == score) & (QuizLeaderboard.time_taken == time_taken)
+               & (QuizLeaderboard.user_id > user_id))
+        )
+    return query
+
+def overall_leaderboard_query(limit: int, after: Optional[list] = None):
+    """
+    One page (plus one row) of the overall leaderboard; user_id breaks ties
+    so pages are stable.
+    """
+    query = (
+        select(OverallLeaderboard.username, OverallLeaderboard.user_id, OverallLeaderboard.average_score)
+        .order_by(OverallLeaderboard.average_score.desc(), OverallLeaderboard.user_id)
+        .limit(limit + 1)
+    )
+    if after:
+        average_score, user_id = after
+        query = query.where(
+            OverallLeaderboard.average_score <= average_score,
+            (OverallLeaderboard.average_score < average_score)
+            | ((OverallLeaderboard.average_score == average_score) & (OverallLeaderboard.user_id > user_id))
+        )
+    return query
+
 @router.get("/leaderboard/{quiz_id}")
-def get_leaderboard_by_quiz(quiz_id: str, session: Session = Depends(get_session)):
+async def get_leaderboard_by_quiz(
+    quiz_id: str,
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Depends(page_size),
+    session: AsyncSession = Depends(get_async_session)
+):
     # 🧠 Check quiz existence
-    quiz = session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id)).first()
+    quiz = (await session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id))).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found.")
 
-    # 📋 Count total questions for that quiz
-    total_marks = session.exec(
-        select(func.count()).select_from(Question).where(Question.quiz_id == quiz_id)
-    ).first()
-
+    # 📋 Total marks are stored on the quiz at creation
+    total_marks = quiz.question_count
     if not total_marks:
         raise HTTPException(status_code=400, detail="No questions found for quiz.")
 
-    # 🏅 Get results with joined user data, ordered by score desc, time asc
-    results = session.exec(
-        select(User.username, User.user_id, QuizResult.score, QuizResult.time_taken)
-        .join(QuizResult, QuizResult.user_id == User.user_id)
-        .where(QuizResult.quiz_id == quiz_id)
-        .order_by(QuizResult.score.desc(), QuizResult.time_taken.asc())
-    ).all()
+    # 🏅 Indexed scan of the materialized leaderboard; ⏩ seek past the previous page
+    after = decode_cursor(cursor, QUIZ_CURSOR, (int, int, str)) if cursor else None
+    query = quiz_leaderboard_query(quiz_id, limit, after)
+
+    results, next_cursor = split_page(
+        (await session.exec(query)).all(), limit, QUIZ_CURSOR, lambda r: (r.score, r.time_taken, r.user_id)
+    )
 
     leaderboard = [
         {
@@ -46,56 +97,110 @@ def get_leaderboard_by_quiz(quiz_id: str, session: Session = Depends(get_session
         "quiz_id": quiz.quiz_id,
         "quiz_name": quiz.quiz_name,
         "total_marks": total_marks,
-        "leaderboard": leaderboard
+        "leaderboard": leaderboard,
+        "next_cursor": next_cursor
     }
 
 # -----------------------------
 # 🌐 OVERALL LEADERBOARD
 # -----------------------------
 @router.get("/overall")
-def get_overall_leaderboard(session: Session = Depends(get_session)):
-    # 🧾 Fetch all quizzes and their total marks
-    quizzes = session.exec(select(Quiz)).all()
-    quiz_question_counts = {
-        quiz.quiz_id: session.exec(
-            select(func.count()).select_from(Question).where(Question.quiz_id == quiz.quiz_id)
-        ).first()
-        for quiz in quizzes
+async def get_overall_leaderboard(
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
+    limit: int = Depends(page_size),
+    session: AsyncSession = Depends(get_async_session)
+):
+    # Maintained on every submission
+    after = decode_cursor(cursor, OVERALL_CURSOR, (float, str)) if cursor else None
+    query = overall_leaderboard_query(limit, after)
+
+    rows, next_cursor = split_page(
+        (await session.exec(query)).all(), limit, OVERALL_CURSOR, lambda r: (r.average_score, r.user_id)
+    )
+    # The body stays a plain list, so the cursor travels in a header
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    # 🥇 Already sorted descending by the index
+    return [
+        {
+            "username": username,
+            "user_id": user_id,
+            "average_score": round(average_score, 2)
+        }
+        for username, user_id, average_score in rows
+    ]
+
+# -----------------------------
+# 🔢 RANK LOOKUPS (in-memory index)
+# -----------------------------
+# async on purpose: they do no I/O, and running on the event loop (like the
+# submissions and syncs that mutate the index) keeps every read consistent
+def quiz_entry(rank: int, key: tuple) -> dict:
+    neg_score, time_taken, user_id = key
+    return {
+        "rank": rank,
+        "username": rank_registry.usernames.get(user_id),
+        "user_id": user_id,
+        "score": -neg_score,
+        "time_taken": time_taken
+    }
+
+def overall_entry(rank: int, key: tuple) -> dict:
+    neg_average, user_id = key
+    return {
+        "rank": rank,
+        "username": rank_registry.usernames.get(user_id),
+        "user_id": user_id,
+        "average_score": round(-neg_average, 2)
+    }
+
+def ranked_index_for_quiz(quiz_id: str, user_id: str):
+    index = rank_registry.quizzes.get(quiz_id)
+    if index is None or index.rank(user_id) is None:
+        raise HTTPException(status_code=404, detail="User has no result for this quiz.")
+    return index
+
+def ranked_overall(user_id: str):
+    if rank_registry.overall.rank(user_id) is None:
+        raise HTTPException(status_code=404, detail="User has no overall ranking yet.")
+    return rank_registry.overall
+
+@router.get("/overall/rank/{user_id}")
+async def get_overall_rank(user_id: str):
+    index = ranked_overall(user_id)
+    return {**overall_entry(index.rank(user_id), index.key(user_id)), "total": len(index)}
+
+@router.get("/overall/neighbors/{user_id}")
+async def get_overall_neighbors(user_id: str, k: int = Query(5, ge=1, le=MAX_NEIGHBORS)):
+    index = ranked_overall(user_id)
+    return {
+        "user_id": user_id,
+        "rank": index.rank(user_id),
+        "total": len(index),
+        "neighbors": [overall_entry(rank, key) for rank, key in index.around(user_id, k)]
+    }
+
+@router.get("/leaderboard/{quiz_id}/rank/{user_id}")
+async def get_quiz_rank(quiz_id: str, user_id: str):
+    index = ranked_index_for_quiz(quiz_id, user_id)
+    return {"quiz_id": quiz_id, **quiz_entry(index.rank(user_id), index.key(user_id)), "total": len(index)}
+
+@router.get("/leaderboard/{quiz_id}/neighbors/{user_id}")
+async def get_quiz_neighbors(quiz_id: str, user_id: str, k: int = Query(5, ge=1, le=MAX_NEIGHBORS)):
+    index = ranked_index_for_quiz(quiz_id, user_id)
+    return {
+        "quiz_id": quiz_id,
+        "user_id": user_id,
+        "rank": index.rank(user_id),
+        "total": len(index),
+        "neighbors": [quiz_entry(rank, key) for rank, key in index.around(user_id, k)]
     }
 
-    # 📊 Fetch all results
-    results = session.exec(
-        select(QuizResult.user_id, QuizResult.quiz_id, QuizResult.score)
-    ).all()
-
-    # 🧮 Aggregate scores
-    user_scores = {}
-    for user_id, quiz_id, score in results:
-        total_marks = quiz_question_counts.get(quiz_id, 0)
-        if total_marks == 0:
-            continue  # skip malformed data
-
-        if user_id not in user_scores:
-            user_scores[user_id] = {'score_sum': 0, 'max_total': 0}
-
-        user_scores[user_id]['score_sum'] += score * 100
-        user_scores[user_id]['max_total'] += total_marks * 100
-
-    # 📦 Build leaderboard
-    leaderboard = []
-    for user_id, score_data in user_scores.items():
-        user = session.exec(select(User).where(User.user_id == user_id)).first()
-        if not user or score_data['max_total'] == 0:
-            continue
-
-        avg_score = round((score_data['score_sum'] / score_data['max_total']) * 100, 2)
-        leaderboard.append({
-            "username": user.username,
-            "user_id": user.user_id,
-            "average_score": avg_score
-        })
-
-    # 🥇 Sort descending
-    leaderboard.sort(key=lambda x: x['average_score'], reverse=True)
-
-    return leaderboard
+@router.get("/rank_index/stats")
+async def get_rank_index_stats():
+    """
+    🔢 Size of this worker's in-memory rank index.
+    """
+    return rank_registry.stats()
@@ -0,0 +1,198 @@
+# backend/leaderboard_store.py
+#
+# Materialized leaderboards. submit_answers folds each result into
+# QuizLeaderboard / OverallLeaderboard inside its own transaction; this
+# module can also rebuild both tables from QuizResult and verify them.
+#   python -m leaderboard_store rebuild
+#   python -m leaderboard_store verify
+
+import argparse
+import sys
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, insert, literal
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from database import dialect_insert
+from models import Quiz, QuizResult, User, QuizLeaderboard, OverallLeaderboard, utc_now
+
+AVERAGE_TOLERANCE = 1e-6
+
+
+async def record_submission(
+    session: AsyncSession,
+    quiz_id: str,
+    user_id: str,
+    username: str,
+    score: int,
+    total_marks: int,
+    time_taken: int,
+    finished_at: datetime,
+) -> Optional[float]:
+    """
+    Add one submission to both leaderboards. Runs in the caller's
+    transaction; the caller commits or rolls back. Returns the user's new
+    overall average, or None if the quiz has no questions.
+    """
+    await session.execute(insert(QuizLeaderboard).values(
+        quiz_id=quiz_id,
+        user_id=user_id,
+        username=username,
+        score=score,
+        total_marks=total_marks,
+        time_taken=time_taken,
+        finished_at=finished_at,
+    ))
+
+    if total_marks <= 0:
+        return None  # quizzes without questions don't count towards the overall average
+
+    upsert = dialect_insert(session)
+    stmt = upsert(OverallLeaderboard).values(
+        user_id=user_id,
+        username=username,
+        score_sum=score,
+        marks_sum=total_marks,
+        quizzes_taken=1,
+        time_sum=time_taken,
+        average_score=score * 100.0 / total_marks,
+        updated_at=utc_now(),
+    )
+    score_sum = OverallLeaderboard.score_sum + stmt.excluded.score_sum
+    marks_sum = OverallLeaderboard.marks_sum + stmt.excluded.marks_sum
+    result = await session.execute(stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "score_sum": score_sum,
+            "marks_sum": marks_sum,
+            "quizzes_taken": OverallLeaderboard.quizzes_taken + 1,
+            "time_sum": OverallLeaderboard.time_sum + stmt.excluded.time_sum,
+            "average_score": score_sum * 100.0 / marks_sum,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(OverallLeaderboard.average_score))
+    return result.scalar_one()
+
+
+# -----------------------------
+# 🔁 REBUILD / VERIFY
+# -----------------------------
+def quiz_rows_from_results():
+    return (
+        select(
+            QuizResult.quiz_id,
+            QuizResult.user_id,
+            User.username,
+            QuizResult.score,
+            Quiz.question_count.label("total_marks"),
+            QuizResult.time_taken,
+            QuizResult.finished_at,
+        )
+        .join(User, User.user_id == QuizResult.user_id)
+        .join(Quiz, Quiz.quiz_id == QuizResult.quiz_id)
+    )
+
+
+def overall_rows_from(quiz_rows):
+    rows = quiz_rows.subquery()
+    return (
+        select(
+            rows.c.user_id,
+            rows.c.username,
+            func.sum(rows.c.score),
+            func.sum(rows.c.total_marks),
+            func.count(),
+            func.sum(rows.c.time_taken),
+            func.sum(rows.c.score) * 100.0 / func.sum(rows.c.total_marks),
+        )
+        .where(rows.c.total_marks > 0)
+        .group_by(rows.c.user_id, rows.c.username)
+    )
+
+
+QUIZ_COLUMNS = ["quiz_id", "user_id", "username", "score", "total_marks", "time_taken", "finished_at"]
+OVERALL_COLUMNS = ["user_id", "username", "score_sum", "marks_sum", "quizzes_taken", "time_sum", "average_score"]
+
+
+def rebuild(session: Session) -> dict:
+    """
+    Recompute both tables from QuizResult in one transaction.
+    """
+    session.execute(delete(OverallLeaderboard))
+    session.execute(delete(QuizLeaderboard))
+    session.execute(insert(QuizLeaderboard).from_select(QUIZ_COLUMNS, quiz_rows_from_results()))
+
+    overall = overall_rows_from(select(*[QuizLeaderboard.__table__.c[c] for c in QUIZ_COLUMNS]))
+    session.execute(insert(OverallLeaderboard).from_select(
+        OVERALL_COLUMNS + ["updated_at"],
+        overall.add_columns(literal(utc_now(), OverallLeaderboard.__table__.c.updated_at.type)),
+    ))
+    session.commit()
+
+    return {
+        "quiz_rows": session.exec(select(func.count()).select_from(QuizLeaderboard)).one(),
+        "overall_rows": session.exec(select(func.count()).select_from(OverallLeaderboard)).one(),
+    }
+
+
+def verify(session: Session, sample: int = 10) -> dict:
+    """
+    Compare both tables against a from-scratch computation over QuizResult.
+    """
+    expected_quiz = {
+        (r[0], r[1]): tuple(r[2:6]) for r in session.exec(quiz_rows_from_results()).all()
+    }
+    actual_quiz = {
+        (r.quiz_id, r.user_id): (r.username, r.score, r.total_marks, r.time_taken)
+        for r in session.exec(select(QuizLeaderboard)).all()
+    }
+    quiz_mismatches = sorted(
+        str(key) for key in expected_quiz.keys() | actual_quiz.keys()
+        if expected_quiz.get(key) != actual_quiz.get(key)
+    )
+
+    expected_overall = {r[0]: tuple(r[1:]) for r in session.exec(overall_rows_from(quiz_rows_from_results())).all()}
+    actual_overall = {
+        r.user_id: (r.username, r.score_sum, r.marks_sum, r.quizzes_taken, r.time_sum, r.average_score)
+        for r in session.exec(select(OverallLeaderboard)).all()
+    }
+
+    def same(a, b):
+        if a is None or b is None:
+            return a == b
+        return a[:-1] == b[:-1] and abs(float(a[-1]) - float(b[-1])) <= AVERAGE_TOLERANCE
+
+    overall_mismatches = sorted(
+        key for key in expected_overall.keys() | actual_overall.keys()
+        if not same(expected_overall.get(key), actual_overall.get(key))
+    )
+
+    return {
+        "ok": not quiz_mismatches and not overall_mismatches,
+        "quiz_rows": len(actual_quiz),
+        "quiz_mismatches": len(quiz_mismatches),
+        "overall_rows": len(actual_overall),
+        "overall_mismatches": len(overall_mismatches),
+        "sample": (quiz_mismatches + overall_mismatches)[:sample],
+    }
+
+
+def main() -> int:
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild or verify the materialized leaderboards.")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        if args.command == "rebuild":
+            print(f"✅ Rebuilt leaderboards: {rebuild(session)}")
+        report = verify(session)
+    print(f"{'✅' if report['ok'] else '❌'} Verify: {report}")
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
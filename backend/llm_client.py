@@ -0,0 +1,120 @@
+# backend/llm_client.py
+
+import asyncio
+import os
+import random
+from typing import Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# -----------------------------
+# 🔐 OpenRouter config
+# -----------------------------
+OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+OPENROUTER_URL = os.getenv("OPENROUTER_URL", "https://openrouter.ai/api/v1/chat/completions")
+LLM_MODEL = os.getenv("LLM_MODEL", "deepseek/deepseek-r1-0528-qwen3-8b:free")
+
+# -----------------------------
+# ⚙️ Client tuning
+# -----------------------------
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", 90))
+LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", 10))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 3))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 8))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", 20))
+
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class LLMError(Exception):
+    """Raised when the LLM call fails or returns an unusable response."""
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """
+    Return the shared keep-alive client, creating it on first use.
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+            ),
+            headers={
+                "Authorization": f"Bearer {OPENROUTER_API_KEY}",
+                "Content-Type": "application/json",
+            },
+        )
+    return _client
+
+
+async def close_client():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def parse_completion(data: dict) -> str:
+    """
+    Extract the assistant message text from a chat-completions response.
+    """
+    if "choices" not in data:
+        raise LLMError(data.get("error", "Missing 'choices' in response."))
+    try:
+        return data["choices"][0]["message"]["content"]
+    except (IndexError, KeyError, TypeError):
+        raise LLMError("Malformed 'choices' in response.")
+
+
+def _backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    # Honour Retry-After when the server sends one, otherwise full jitter
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), LLM_BACKOFF_MAX_SECONDS)
+    ceiling = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return random.uniform(0, ceiling)
+
+
+async def chat(prompt: str, timeout: Optional[float] = None) -> str:
+    """
+    Send a single-message chat completion and return the reply text.
+
+    Transport errors and retryable HTTP statuses are retried with jittered
+    exponential backoff, up to LLM_MAX_RETRIES extra attempts.
+    """
+    client = get_client()
+    payload = {
+        "model": LLM_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+    }
+    request_timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        retry_after = None
+        try:
+            res = await client.post(OPENROUTER_URL, json=payload, timeout=request_timeout)
+            if res.status_code in RETRYABLE_STATUS and attempt < LLM_MAX_RETRIES:
+                retry_after = res.headers.get("Retry-After")
+            else:
+                res.raise_for_status()
+                return parse_completion(res.json())
+        except httpx.TransportError as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise LLMError(f"LLM request failed: {e}") from e
+        except httpx.HTTPStatusError as e:
+            raise LLMError(f"LLM returned HTTP {e.response.status_code}") from e
+        except ValueError as e:
+            raise LLMError(f"LLM returned invalid JSON: {e}") from e
+
+        await asyncio.sleep(_backoff_delay(attempt, retry_after))
+
+    raise LLMError("LLM request failed after retries.")
@@ -3,8 +3,9 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
-from database import create_db_and_tables
+from database import create_db_and_tables, engine, async_engine, async_session_factory, pool_stats
 from auth import router as auth_router
 from ai_code.quiz import router as quiz_router
 from results import router as results_router
@@ -12,14 +13,32 @@ from leaderboard import router as leaderboard_router
 from badges import router as badges_router
 from explanations import router as explanations_router
 from getquiz import router as get_quiz_router 
+from ai_code.pdf_extract import shutdown_executor
+from password_pool import shutdown_executor as shutdown_password_pool
+from ai_code.jobs import job_queue
+from ai_code.duration import run_periodic_refit
+from llm_client import close_client
+from rank_index import rank_registry, run_periodic_sync
+from pagination import NEXT_CURSOR_HEADER
 
 # Lifespan context to run code on startup/shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 Starting up... creating database tables.")
     create_db_and_tables()
+    await job_queue.start()
+    refit_task = asyncio.create_task(run_periodic_refit(engine))
+    await rank_registry.warm(async_session_factory)
+    rank_task = asyncio.create_task(run_periodic_sync(async_session_factory))
     yield
     print("🛑 Shutting down... cleanup if needed.")
+    refit_task.cancel()
+    rank_task.cancel()
+    await job_queue.stop()
+    shutdown_executor()
+    shutdown_password_pool()
+    await close_client()
+    await async_engine.dispose()
 
 # Main app instance with lifespan handler
 app = FastAPI(
@@ -34,6 +53,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],  # pagination cursor for list responses
 )
 
 # Root health-check route
@@ -41,6 +61,11 @@ app.add_middleware(
 def read_root():
     return {"message": "Welcome to QuizForge AI Backend!"}
 
+# Connection pool health (checked-out, overflow, checkout wait time)
+@app.get("/health/db")
+def read_db_health():
+    return pool_stats()
+
 # Registering all routers
 app.include_router(auth_router, prefix="/auth", tags=["Auth"])
 app.include_router(quiz_router, prefix="/quiz", tags=["Quiz"])
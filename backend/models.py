@@ -1,12 +1,16 @@
 from sqlmodel import SQLModel, Field, Relationship
+from sqlalchemy import DateTime, Index, UniqueConstraint, text
 from typing import Optional, List
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 import uuid
 from pydantic import BaseModel, EmailStr
 
-# Helper for timezone-aware UTC default
+# Helper for UTC defaults. Naive on purpose: every DateTime column is
+# TIMESTAMP WITHOUT TIME ZONE, and asyncpg rejects aware values for those.
+# Timestamp fields set sa_type=DateTime so newer sqlmodel releases, which
+# map `datetime` to an aware-only type, keep the naive column.
 def utc_now():
-    return datetime.now(timezone.utc)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 # -----------------------------
 # 🔐 USER MODEL
@@ -14,7 +18,7 @@ def utc_now():
 class User(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(default_factory=lambda: str(uuid.uuid4()), index=True, unique=True)
-    username: str
+    username: str = Field(index=True)  # login looks users up by username or email
     email: str = Field(unique=True)
     hashed_password: str
 
@@ -30,13 +34,14 @@ class User(SQLModel, table=True):
 class Quiz(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     quiz_id: str = Field(default_factory=lambda: str(uuid.uuid4()), unique=True, index=True)
-    quiz_name: str
+    quiz_name: str = Field(index=True, unique=True)
     max_users: int #set by user
     participants_attempted: int = Field(default=0) #backend managed
     creator_id: Optional[str] = Field(default=None, foreign_key="user.user_id")
-    created_at: datetime = Field(default_factory=utc_now)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
     difficulty: str = Field(default="medium")
     duration_minutes: Optional[int] = Field(default=None)  # AI-generated time
+    question_count: int = Field(default=0)  # fixed at creation; also the max score (1 mark each)
 
     # Relationships
     creator: Optional[User] = Relationship(back_populates="quizzes_created")
@@ -48,7 +53,7 @@ class Quiz(SQLModel, table=True):
 # -----------------------------
 class Question(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    quiz_id: str = Field(foreign_key="quiz.quiz_id")  # ✅ Correct
+    quiz_id: str = Field(foreign_key="quiz.quiz_id", index=True)  # ✅ Correct
     question_text: str
     option_a: str
     option_b: str
@@ -63,10 +68,12 @@ class Question(SQLModel, table=True):
 # 👥 USER-QUIZ LINK MODEL
 # -----------------------------
 class UserQuiz(SQLModel, table=True):
+    __table_args__ = (UniqueConstraint("quiz_id", "user_id", name="uq_userquiz_quiz_user"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(foreign_key="user.user_id")
     quiz_id: str = Field(foreign_key="quiz.quiz_id")
-    started_at: datetime = Field(default_factory=utc_now)
+    started_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
     quiz: Optional[Quiz] = Relationship(back_populates="participants")
     user: Optional[User] = Relationship()
 
@@ -86,13 +93,20 @@ class UserResponse(SQLModel, table=True):
 # 🏁 QUIZ RESULT MODEL
 # -----------------------------
 class QuizResult(SQLModel, table=True):
+    # One result per user per quiz; double submissions fail on insert
+    __table_args__ = (
+        UniqueConstraint("user_id", "quiz_id", name="uq_quizresult_user_quiz"),
+        # Per-quiz leaderboard: filter by quiz, order by score desc, time asc
+        Index("ix_quizresult_quiz_score_time", "quiz_id", "score", "time_taken"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(foreign_key="user.user_id")
     quiz_id: str = Field(foreign_key="quiz.quiz_id")
     score: int
     accuracy: float
     time_taken: int
-    finished_at: datetime = Field(default_factory=utc_now)
+    finished_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
 
     user: Optional[User] = Relationship(back_populates="results")
 
@@ -116,20 +130,112 @@ class UserRead(BaseModel):
 # ✅ ANSWER MODEL
 # -----------------------------
 class Answer(SQLModel, table=True):
+    __table_args__ = (Index("ix_answer_quiz_user", "quiz_id", "user_id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: str = Field(foreign_key="user.user_id")
     quiz_id: str = Field(foreign_key="quiz.quiz_id")
     question_id: int = Field(foreign_key="question.id")
     selected_index: int
-    submitted_at: datetime = Field(default_factory=utc_now)
+    submitted_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
     
     
 class UserBadge(SQLModel, table=True):
+    __table_args__ = (
+        UniqueConstraint("user_id", "quiz_id", "badge_name", "scope", name="uq_userbadge_user_quiz_badge"),
+        Index("ix_userbadge_user_scope_awarded", "user_id", "scope", "awarded_at"),
+        # Keyset pages of a user's badges: awarded_at desc, id desc
+        Index("ix_userbadge_user_awarded_id", "user_id", "awarded_at", "id"),
+        # quiz_id is NULL for overall badges, so the constraint above can't dedupe them
+        Index(
+            "uq_userbadge_user_overall_badge", "user_id", "badge_name", unique=True,
+            postgresql_where=text("scope = 'overall'"), sqlite_where=text("scope = 'overall'"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
 
     user_id: str = Field(foreign_key="user.user_id")          # ✅ VARCHAR
     badge_name: str
     scope: str  # "per_quiz" or "overall"
     quiz_id: Optional[str] = Field(default=None, foreign_key="quiz.quiz_id")
-    awarded_at: datetime = Field(default_factory=datetime.now)
+    awarded_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
     user: Optional["User"] = Relationship(back_populates="badges")
+
+# -----------------------------
+# 🗃️ GENERATED QUESTION SET CACHE
+# -----------------------------
+class GeneratedQuestionSet(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cache_key: str = Field(index=True, unique=True)  # sha256 of PDF bytes + generation params
+    questions_json: str
+    duration_minutes: Optional[int] = Field(default=None)
+    hit_count: int = Field(default=0)
+    created_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
+    last_used_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
+
+# -----------------------------
+# 📨 BACKGROUND GENERATION JOBS
+# -----------------------------
+# Written by the worker process that runs the job, so any app worker can
+# answer status polls. Times are epoch seconds, as the jobs API returns them.
+class GenerationJob(SQLModel, table=True):
+    id: Optional[int] = Field(default=None, primary_key=True)
+    job_id: str = Field(index=True, unique=True)
+    kind: str
+    status: str
+    result_json: Optional[str] = Field(default=None)
+    error: Optional[str] = Field(default=None)
+    error_code: Optional[int] = Field(default=None)
+    created_at: float
+    started_at: Optional[float] = Field(default=None)
+    finished_at: Optional[float] = Field(default=None, index=True)  # retention pruning
+
+# -----------------------------
+# 📊 MATERIALIZED LEADERBOARDS
+# -----------------------------
+# Maintained incrementally by submit_answers; rebuilt from QuizResult by
+# `python -m leaderboard_store rebuild`.
+class QuizLeaderboard(SQLModel, table=True):
+    quiz_id: str = Field(foreign_key="quiz.quiz_id", primary_key=True)
+    user_id: str = Field(foreign_key="user.user_id", primary_key=True)
+    username: str
+    score: int
+    total_marks: int
+    time_taken: int
+    finished_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
+
+class OverallLeaderboard(SQLModel, table=True):
+    user_id: str = Field(foreign_key="user.user_id", primary_key=True)
+    username: str
+    score_sum: int = Field(default=0)
+    marks_sum: int = Field(default=0)
+    quizzes_taken: int = Field(default=0)
+    time_sum: int = Field(default=0)
+    average_score: float = Field(default=0.0)  # score_sum / marks_sum * 100
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
+
+# Top-K scans in leaderboard order: score desc, time asc (user_id breaks ties)
+Index(
+    "ix_quizleaderboard_rank",
+    QuizLeaderboard.quiz_id, QuizLeaderboard.score.desc(), QuizLeaderboard.time_taken, QuizLeaderboard.user_id,
+)
+Index("ix_overallleaderboard_rank", OverallLeaderboard.average_score.desc(), OverallLeaderboard.user_id)
+# Incremental rank-index sync: rows changed since a watermark
+Index("ix_quizleaderboard_finished_at", QuizLeaderboard.finished_at)
+Index("ix_overallleaderboard_updated_at", OverallLeaderboard.updated_at)
+
+# -----------------------------
+# 📈 PER-USER BADGE AGGREGATES
+# -----------------------------
+# Running totals the overall badge rules are evaluated against; updated by
+# submit_answers and rebuilt by `python -m badge_engine backfill`.
+class UserStats(SQLModel, table=True):
+    user_id: str = Field(foreign_key="user.user_id", primary_key=True)
+    quizzes_completed: int = Field(default=0)
+    accuracy_sum: float = Field(default=0.0)
+    recent_accuracies: str = Field(default="[]")  # JSON list, newest last, capped at RECENT_WINDOW
+    current_streak_days: int = Field(default=0)
+    longest_streak_days: int = Field(default=0)
+    last_active_on: Optional[date] = Field(default=None)
+    updated_at: datetime = Field(default_factory=utc_now, sa_type=DateTime)
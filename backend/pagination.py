@@ -0,0 +1,75 @@
+# backend/pagination.py
+#
+# Keyset pagination helpers. A cursor is the sort key of the last row on
+# a page, base64-encoded so clients treat it as opaque; the next page
+# seeks past it through the index, so page 1000 costs the same as page 1.
+
+import base64
+import binascii
+import json
+import math
+import os
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query
+
+PAGE_SIZE_DEFAULT = int(os.getenv("PAGE_SIZE_DEFAULT", 100))
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", 500))
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(kind: str, values: Sequence) -> str:
+    raw = json.dumps({"k": kind, "v": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+BIGINT_LIMIT = 2 ** 63
+
+
+def _matches(value, expected: type) -> bool:
+    # Anything the database would refuse to bind (NUL bytes, out-of-range
+    # integers, NaN) must fail here as a 400 rather than there as a 500
+    if isinstance(value, bool):
+        return False  # JSON true/false would pass as int
+    if expected is int:
+        return isinstance(value, int) and -BIGINT_LIMIT <= value < BIGINT_LIMIT
+    if expected is float:
+        return isinstance(value, (int, float)) and math.isfinite(value) and abs(value) < BIGINT_LIMIT
+    if expected is str:
+        return isinstance(value, str) and "\x00" not in value
+    return isinstance(value, expected)
+
+
+def decode_cursor(cursor: str, kind: str, types: Sequence[type]) -> list:
+    """
+    Return the key values stored in cursor, one per entry in types
+    (int, float or str). Raises 400 if the cursor is malformed, holds a
+    value of the wrong type, or was issued by a different listing.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = data["v"]
+        if data["k"] != kind or not isinstance(values, list) or len(values) != len(types):
+            raise ValueError
+        if not all(_matches(v, t) for v, t in zip(values, types)):
+            raise ValueError
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
+
+
+def page_size(limit: Optional[int] = Query(None, ge=1, le=PAGE_SIZE_MAX, description="Page size")) -> int:
+    return limit or PAGE_SIZE_DEFAULT
+
+
+def split_page(rows: list, limit: int, kind: str, key: Callable[[object], Sequence]) -> Tuple[List, Optional[str]]:
+    """
+    rows must have been fetched with limit + 1; the extra row only signals
+    that another page exists.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(kind, key(rows[-1]))
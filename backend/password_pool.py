@@ -0,0 +1,103 @@
+# backend/password_pool.py
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Tuple
+
+from utils import hash_password, verify_and_update_password
+
+# ⚙️ Pool settings (override via environment)
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", min(4, os.cpu_count() or 2)))
+# Hashes queued or running at once; beyond this requests fail fast with 503
+PASSWORD_MAX_IN_FLIGHT = int(os.getenv("PASSWORD_MAX_IN_FLIGHT", PASSWORD_WORKERS * 8))
+
+_executor: Optional[ProcessPoolExecutor] = None
+_in_flight = 0
+
+# Per-process counters, exposed via /auth/password_pool_stats
+pool_counters = {"completed": 0, "rejected": 0, "rehashed": 0, "restarts": 0}
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when PASSWORD_MAX_IN_FLIGHT hashing jobs are already queued,
+    or when the pool keeps breaking."""
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """
+    Lazily create the process pool reserved for bcrypt, so CPU-bound
+    hashing never occupies the threadpool the other routes rely on.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PASSWORD_WORKERS)
+    return _executor
+
+
+def _discard_executor(broken: ProcessPoolExecutor):
+    """
+    Drop a pool that lost a worker; a broken pool fails every later submit,
+    so the next get_executor() call starts a fresh one.
+    """
+    global _executor
+    if _executor is broken:
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        pool_counters["restarts"] += 1
+
+
+def shutdown_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run(fn, *args):
+    global _in_flight
+    if _in_flight >= PASSWORD_MAX_IN_FLIGHT:
+        pool_counters["rejected"] += 1
+        raise PasswordPoolBusy()
+
+    _in_flight += 1
+    try:
+        # 🔁 A worker that died (e.g. OOM-killed) breaks the pool; retry once on a fresh one
+        for _ in range(2):
+            executor = get_executor()
+            try:
+                result = await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+                break
+            except BrokenProcessPool:
+                _discard_executor(executor)
+        else:
+            raise PasswordPoolBusy()
+    finally:
+        _in_flight -= 1
+    pool_counters["completed"] += 1
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Returns (valid, new_hash); new_hash is set when the stored hash should
+    be replaced (cost factor changed since it was made).
+    """
+    valid, new_hash = await _run(verify_and_update_password, password, hashed_password)
+    if new_hash:
+        pool_counters["rehashed"] += 1
+    return valid, new_hash
+
+
+def pool_stats() -> dict:
+    return {
+        **pool_counters,
+        "in_flight": _in_flight,
+        "max_in_flight": PASSWORD_MAX_IN_FLIGHT,
+        "workers": PASSWORD_WORKERS,
+    }
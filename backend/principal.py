@@ -0,0 +1,121 @@
+# backend/principal.py
+
+import hashlib
+import os
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from cache import TTLCache
+from database import get_async_session
+from models import User
+from utils import decode_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+
+# ⚙️ Cache limits (override via environment)
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", 10000))
+PRINCIPAL_CACHE_TTL_SECONDS = int(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", 300))
+
+# Verified claims per token (each entry lives until its token expires) and
+# resolved users per user_id; users are never deleted, so a short TTL is enough
+token_cache = TTLCache(TOKEN_CACHE_MAX_ENTRIES, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+principal_cache = TTLCache(PRINCIPAL_CACHE_MAX_ENTRIES, PRINCIPAL_CACHE_TTL_SECONDS)
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+
+class Principal(BaseModel):
+    user_id: str
+    username: str
+
+
+def verify_token(token: str) -> dict:
+    """
+    Return the token's claims, verifying the signature only the first time
+    a token is seen. Raises 401 for invalid or expired tokens.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = decode_access_token(token)
+        if not claims or not claims.get("sub"):
+            raise HTTPException(
+                status_code=401, detail="Invalid or expired token.", headers={"WWW-Authenticate": "Bearer"}
+            )
+        remaining = min(claims.get("exp", 0) - time.time(), token_cache.ttl_seconds)
+        if remaining > 0:
+            token_cache.set(key, claims, ttl_seconds=remaining)
+    return claims
+
+
+def principal_query(user_id: str):
+    return select(User.user_id, User.username).where(User.user_id == user_id)
+
+
+async def load_principal(session: AsyncSession, user_id: str) -> Optional[Principal]:
+    """
+    Resolve a user_id to a Principal; queries the request's session only
+    on a cache miss.
+    """
+    principal = principal_cache.get(user_id)
+    if principal is not None:
+        return principal
+
+    row = (await session.exec(principal_query(user_id))).first()
+    if not row:
+        return None
+
+    principal = Principal(user_id=row[0], username=row[1])
+    principal_cache.set(user_id, principal)
+    return principal
+
+
+async def get_optional_principal(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    session: AsyncSession = Depends(get_async_session),
+) -> Optional[Principal]:
+    """
+    Dependency: the caller's Principal if a bearer token was sent, else None.
+    A token that is sent but invalid is still rejected.
+    """
+    if credentials is None:
+        return None
+    claims = verify_token(credentials.credentials)
+    principal = await load_principal(session, claims["sub"])
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Token user no longer exists.")
+    return principal
+
+
+async def get_current_principal(principal: Optional[Principal] = Depends(get_optional_principal)) -> Principal:
+    """
+    Dependency for routes that require a bearer token.
+    """
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Not authenticated.", headers={"WWW-Authenticate": "Bearer"})
+    return principal
+
+
+async def resolve_user(session: AsyncSession, user_id: str, principal: Optional[Principal]) -> Principal:
+    """
+    The user a route acts for. With a token, user_id must be the token's
+    own user; without one (legacy clients), the user only has to exist.
+    """
+    if principal is not None:
+        if principal.user_id != user_id:
+            raise HTTPException(status_code=403, detail="Token does not belong to this user.")
+        return principal
+
+    user = await load_principal(session, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found.")
+    return user
+
+
+def cache_stats() -> dict:
+    return {"tokens": token_cache.stats(), "principals": principal_cache.stats()}
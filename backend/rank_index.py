@@ -0,0 +1,211 @@
+# backend/rank_index.py
+#
+# In-memory order-statistic index over the materialized leaderboards, so
+# "what's my rank?" and "who is around me?" are O(log n) lookups instead of
+# downloading the whole leaderboard. Each worker keeps its own copy: it is
+# built from the database once at startup (restart a worker to rebuild it),
+# updated by submissions handled in this process, and synced periodically
+# with only the leaderboard rows other workers changed since the last sync.
+# Readers and writers all run on the event loop, never in threads.
+
+import asyncio
+import os
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sortedcontainers import SortedList
+from sqlmodel import select
+
+from models import QuizLeaderboard, OverallLeaderboard, utc_now
+
+RANK_INDEX_SYNC_SECONDS = int(os.getenv("RANK_INDEX_SYNC_SECONDS", 30))
+# Re-read this far behind the watermark to absorb clock skew between
+# workers and rows committed after their timestamp was taken
+RANK_INDEX_SYNC_OVERLAP_SECONDS = int(os.getenv("RANK_INDEX_SYNC_OVERLAP_SECONDS", 120))
+MAX_NEIGHBORS = 50
+
+
+class RankIndex:
+    """
+    Sorted ranking of users; a lower key ranks higher. Keys end in user_id
+    so ties are ordered exactly like the leaderboard endpoints.
+    """
+
+    def __init__(self):
+        self._keys = SortedList()
+        self._by_user: Dict[str, Tuple] = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def upsert(self, user_id: str, key: Tuple):
+        old = self._by_user.get(user_id)
+        if old is not None:
+            self._keys.remove(old)
+        self._keys.add(key)
+        self._by_user[user_id] = key
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """1-based position, or None if the user is not ranked."""
+        key = self._by_user.get(user_id)
+        if key is None:
+            return None
+        return self._keys.index(key) + 1
+
+    def key(self, user_id: str) -> Optional[Tuple]:
+        return self._by_user.get(user_id)
+
+    def around(self, user_id: str, k: int) -> List[Tuple[int, Tuple]]:
+        """Up to k entries either side of user_id, as (rank, key) pairs."""
+        key = self._by_user.get(user_id)
+        if key is None:
+            return []
+        pos = self._keys.index(key)
+        start = max(0, pos - k)
+        return [(start + i + 1, entry) for i, entry in enumerate(self._keys[start:pos + k + 1])]
+
+
+def quiz_key(score: int, time_taken: int, user_id: str) -> Tuple:
+    return (-score, time_taken, user_id)
+
+
+def overall_key(average_score: float, user_id: str) -> Tuple:
+    return (-average_score, user_id)
+
+
+# Statement builders, shared with benchmarks/check_query_plans.py
+def quiz_changes_query(since):
+    return select(
+        QuizLeaderboard.quiz_id, QuizLeaderboard.user_id, QuizLeaderboard.username,
+        QuizLeaderboard.score, QuizLeaderboard.time_taken,
+    ).where(QuizLeaderboard.finished_at >= since)
+
+
+def overall_changes_query(since):
+    return select(
+        OverallLeaderboard.user_id, OverallLeaderboard.username, OverallLeaderboard.average_score,
+    ).where(OverallLeaderboard.updated_at >= since)
+
+
+class RankRegistry:
+    def __init__(self):
+        self.quizzes: Dict[str, RankIndex] = {}
+        self.overall = RankIndex()
+        self.usernames: Dict[str, str] = {}
+        self.warmed = False
+        self.synced_at = None  # watermark (naive UTC) of the last warm or sync
+        self.counters = {"warms": 0, "syncs": 0, "synced_rows": 0}
+        self._pending: Optional[list] = None  # submissions seen while a warm is in flight
+
+    def record_result(
+        self,
+        quiz_id: str,
+        user_id: str,
+        username: str,
+        score: int,
+        time_taken: int,
+        average_score: Optional[float],
+    ):
+        """
+        Apply one committed submission. average_score is the user's new
+        overall average, or None if the quiz doesn't count towards it.
+        """
+        self.usernames[user_id] = username
+        self.quizzes.setdefault(quiz_id, RankIndex()).upsert(user_id, quiz_key(score, time_taken, user_id))
+        if average_score is not None:
+            self.overall.upsert(user_id, overall_key(average_score, user_id))
+        if self._pending is not None:
+            self._pending.append((quiz_id, user_id, username, score, time_taken, average_score))
+
+    async def warm(self, session_factory):
+        """
+        Rebuild every index from the full leaderboard tables, then swap it
+        in. Submissions recorded during the load are replayed on top.
+        Only run at startup (restarting a worker is the manual recovery);
+        sync() keeps it current in between.
+        """
+        self._pending = []
+        started_at = utc_now()
+        try:
+            quizzes: Dict[str, RankIndex] = {}
+            overall = RankIndex()
+            usernames: Dict[str, str] = {}
+            async with session_factory() as session:
+                rows = await session.exec(select(
+                    QuizLeaderboard.quiz_id, QuizLeaderboard.user_id, QuizLeaderboard.username,
+                    QuizLeaderboard.score, QuizLeaderboard.time_taken,
+                ))
+                for quiz_id, user_id, username, score, time_taken in rows:
+                    usernames[user_id] = username
+                    quizzes.setdefault(quiz_id, RankIndex()).upsert(user_id, quiz_key(score, time_taken, user_id))
+
+                rows = await session.exec(select(
+                    OverallLeaderboard.user_id, OverallLeaderboard.username, OverallLeaderboard.average_score,
+                ))
+                for user_id, username, average_score in rows:
+                    usernames[user_id] = username
+                    overall.upsert(user_id, overall_key(average_score, user_id))
+
+            pending, self._pending = self._pending, None
+            self.quizzes, self.overall, self.usernames = quizzes, overall, usernames
+            for record in pending:
+                self.record_result(*record)
+            self.warmed = True
+            self.synced_at = started_at
+            self.counters["warms"] += 1
+        finally:
+            self._pending = None
+
+    async def sync(self, session_factory) -> int:
+        """
+        Apply leaderboard rows written since the last warm or sync (by any
+        worker). Both reads are index range scans on the change timestamps;
+        re-applying a row is harmless, so the overlap only costs a few rows.
+        Returns the number of rows applied.
+        """
+        if self.synced_at is None:
+            return 0
+        started_at = utc_now()
+        since = self.synced_at - timedelta(seconds=RANK_INDEX_SYNC_OVERLAP_SECONDS)
+        async with session_factory() as session:
+            quiz_rows = (await session.exec(quiz_changes_query(since))).all()
+            overall_rows = (await session.exec(overall_changes_query(since))).all()
+
+        # No awaits from here on, so readers never see a half-applied sync
+        for quiz_id, user_id, username, score, time_taken in quiz_rows:
+            self.usernames[user_id] = username
+            self.quizzes.setdefault(quiz_id, RankIndex()).upsert(user_id, quiz_key(score, time_taken, user_id))
+        for user_id, username, average_score in overall_rows:
+            self.usernames[user_id] = username
+            self.overall.upsert(user_id, overall_key(average_score, user_id))
+
+        self.synced_at = started_at
+        self.counters["syncs"] += 1
+        self.counters["synced_rows"] += len(quiz_rows) + len(overall_rows)
+        return len(quiz_rows) + len(overall_rows)
+
+    def stats(self) -> dict:
+        return {
+            "warmed": self.warmed,
+            "quizzes": len(self.quizzes),
+            "quiz_entries": sum(len(index) for index in self.quizzes.values()),
+            "overall_entries": len(self.overall),
+            "synced_at": self.synced_at.isoformat() if self.synced_at else None,
+            **self.counters,
+        }
+
+
+rank_registry = RankRegistry()
+
+
+async def run_periodic_sync(session_factory, interval: int = RANK_INDEX_SYNC_SECONDS):
+    """
+    Background loop started by the app lifespan (after the startup warm):
+    every interval, pull in the submissions other workers handled.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await rank_registry.sync(session_factory)
+        except Exception as e:
+            print(f"⚠️ Rank index sync failed: {e}")
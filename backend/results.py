@@ -1,105 +1,111 @@
 from fastapi import APIRouter, Form, Depends, HTTPException
-from sqlmodel import select, Session
-from typing import Dict
-from models import Question, Quiz, QuizResult, User, UserQuiz, UserBadge, Answer
-from database import get_session
-from datetime import datetime
+from sqlalchemy import insert
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Dict, Optional
+from models import Question, Quiz, QuizResult, UserQuiz, UserBadge, Answer, utc_now
+from database import get_async_session, dialect_insert
+from leaderboard_store import record_submission
+from rank_index import rank_registry
+from badge_engine import record_result as record_badge_result
+from principal import Principal, get_optional_principal, resolve_user
 import json
 
 router = APIRouter()
 
+LETTER_TO_INDEX = {"A": 0, "B": 1, "C": 2, "D": 3}
+
+def badge_for_accuracy(accuracy: float) -> str:
+    return (
+        "Perfect Scorer" if accuracy == 100 else
+        "Quiz Master" if accuracy >= 80 else
+        "Good Attempt" if accuracy >= 50 else
+        "Participant"
+    )
+
+def parse_answer_map(answers: str) -> Dict[str, str]:
+    try:
+        if isinstance(answers, str):
+            answer_map = json.loads(answers)
+            if isinstance(answer_map, str):
+                answer_map = json.loads(answer_map)
+        else:
+            raise ValueError
+        if not isinstance(answer_map, dict):
+            raise ValueError
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid answers format.")
+    return answer_map
+
+# Statement builders, shared with benchmarks/check_query_plans.py
+def quiz_start_query(user_id: str, quiz_id: str):
+    return select(UserQuiz).where((UserQuiz.user_id == user_id) & (UserQuiz.quiz_id == quiz_id))
+
+def scoring_questions_query(quiz_id: str):
+    return select(Question.id, Question.correct_index).where(Question.quiz_id == quiz_id)
+
 @router.post("/submit_answers")
-def submit_answers(
+async def submit_answers(
     user_id: str = Form(...),
     answers: str = Form(...),
     quiz_id: str = Form(...),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_async_session),
+    principal: Optional[Principal] = Depends(get_optional_principal)
 ):
     # 👤 Validate User
-    user = session.exec(select(User).where(User.user_id == user_id)).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found.")
+    user = await resolve_user(session, user_id, principal)
 
     # 🧾 Validate Quiz
-    quiz = session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id)).first()
+    quiz = (await session.exec(select(Quiz).where(Quiz.quiz_id == quiz_id))).first()
     if not quiz:
         raise HTTPException(status_code=404, detail="Quiz not found.")
 
-    # ⛔ Prevent Resubmission
-    existing_result = session.exec(
-        select(QuizResult).where(
-            (QuizResult.user_id == user_id) & 
-            (QuizResult.quiz_id == quiz_id)
-        )
-    ).first()
-    if existing_result:
-        raise HTTPException(status_code=403, detail="You have already submitted this quiz.")
-
     # ⏱ Fetch Quiz Start Info
-    user_quiz = session.exec(
-        select(UserQuiz).where(
-            (UserQuiz.user_id == user_id) & 
-            (UserQuiz.quiz_id == quiz_id)
-        )
-    ).first()
+    user_quiz = (await session.exec(quiz_start_query(user_id, quiz_id))).first()
     if not user_quiz:
         raise HTTPException(status_code=400, detail="Quiz was not started properly.")
 
-    started_at = user_quiz.started_at
-    finished_at = datetime.now()
-    time_taken = int((finished_at - started_at).total_seconds() // 60)
+    # Both naive UTC, as stored
+    finished_at = utc_now()
+    time_taken = int((finished_at - user_quiz.started_at).total_seconds() // 60)
 
     # 🧾 Parse Answer JSON
-    try:
-        if isinstance(answers, str):
-            answer_map = json.loads(answers)
-            if isinstance(answer_map, str):
-                answer_map = json.loads(answer_map)
-        else:
-            raise ValueError
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid answers format.")
+    answer_map = parse_answer_map(answers)
 
-    # 🧠 Fetch Quiz Questions
-    questions = session.exec(select(Question).where(Question.quiz_id == quiz_id)).all()
+    # 🧠 Fetch Quiz Questions (only what scoring needs)
+    questions = (await session.exec(scoring_questions_query(quiz_id))).all()
 
-    # 🧮 Score Calculation
+    # 🧮 Score in memory and collect answer rows
     score = 0
-    for q in questions:
-        qid_str = str(q.id)
-        if qid_str in answer_map:
-            user_ans = answer_map[qid_str].upper()
-            correct_ans = ["A", "B", "C", "D"][q.correct_index]
-            if user_ans == correct_ans:
-                score += 1
-                
-    total_questions = len(questions)
-    accuracy = (score / total_questions) * 100 if total_questions > 0 else 0.0
-    # ✅ Save Individual Answers
-    # ✅ Save Individual Answers
-    for q in questions:
-        qid_str = str(q.id)
-        if qid_str in answer_map:
-            user_ans = answer_map[qid_str].upper()
-            selected_index = {"A": 0, "B": 1, "C": 2, "D": 3}.get(user_ans)
-            if selected_index is None:
-                continue  # 🚨 Skip invalid answers
-        else:
+    answer_rows = []
+    for question_id, correct_index in questions:
+        user_ans = answer_map.get(str(question_id))
+        if not isinstance(user_ans, str):
             continue  # 🚨 Skip unanswered questions
+        selected_index = LETTER_TO_INDEX.get(user_ans.upper())
+        if selected_index is None:
+            continue  # 🚨 Skip invalid answers
+        if selected_index == correct_index:
+            score += 1
+        answer_rows.append({
+            "user_id": user_id,
+            "quiz_id": quiz_id,
+            "question_id": question_id,
+            "selected_index": selected_index,
+            "submitted_at": finished_at,
+        })
 
-        # ✅ Only add if selected_index is valid
-        answer = Answer(
-            user_id=user_id,
-            quiz_id=quiz_id,
-            question_id=q.id,
-            selected_index=selected_index,
-            submitted_at=finished_at
-        )
-        session.add(answer)
+    total_questions = quiz.question_count
+    accuracy = (score / total_questions) * 100 if total_questions > 0 else 0.0
+    badge_name = badge_for_accuracy(accuracy)
 
-        session.commit()
-        # 💾 Save Quiz Result
-        result = QuizResult(
+    # 💾 One transaction: result, answers, badges, leaderboards
+    # (any other failure propagates; closing the session rolls it back)
+    upsert = dialect_insert(session)
+    # The unique (user_id, quiz_id) constraint turns a double submission into a no-op
+    inserted = (await session.execute(
+        upsert(QuizResult)
+        .values(
             user_id=user_id,
             quiz_id=quiz_id,
             score=score,
@@ -107,36 +113,41 @@ def submit_answers(
             time_taken=time_taken,
             finished_at=finished_at
         )
-        session.add(result)
-        session.commit()
-
-        # 🏅 Badge Assignment
-        badge_name = (
-            "Perfect Scorer" if accuracy == 100 else
-            "Quiz Master" if accuracy >= 80 else
-            "Good Attempt" if accuracy >= 50 else
-            "Participant"
+        .on_conflict_do_nothing(index_elements=["user_id", "quiz_id"])
+        .returning(QuizResult.id)
+    )).first()
+    if not inserted:
+        await session.rollback()
+        raise HTTPException(status_code=403, detail="You have already submitted this quiz.")
+
+    if answer_rows:
+        await session.execute(insert(Answer), answer_rows)
+
+    # 🏅 Badge upsert
+    await session.execute(
+        upsert(UserBadge)
+        .values(
+            user_id=user_id,
+            quiz_id=quiz_id,
+            badge_name=badge_name,
+            scope="per_quiz",
+            awarded_at=utc_now()
         )
-        scope = "per_quiz"
-
-        existing_badge = session.exec(
-            select(UserBadge).where(
-                (UserBadge.user_id == user_id) &
-                (UserBadge.quiz_id == quiz_id) &
-                (UserBadge.badge_name == badge_name) &
-                (UserBadge.scope == scope)
-            )
-        ).first()
-
-        if not existing_badge:
-            new_badge = UserBadge(
-                user_id=user_id,
-                quiz_id=quiz_id,
-                badge_name=badge_name,
-                scope=scope
-            )
-            session.add(new_badge)
-        session.commit()
+        .on_conflict_do_nothing(index_elements=["user_id", "quiz_id", "badge_name", "scope"])
+    )
+
+    # 📊 Fold the result into the materialized leaderboards
+    average_score = await record_submission(
+        session, quiz_id, user_id, user.username,
+        score, total_questions, time_taken, finished_at
+    )
+
+    # 🎖️ Update running aggregates and award any overall badges now earned
+    overall_badges = await record_badge_result(session, user_id, accuracy, finished_at)
+    await session.commit()
+
+    # 🔢 Only committed results reach the in-memory rank index
+    rank_registry.record_result(quiz_id, user_id, user.username, score, time_taken, average_score)
 
     return {
         "status": "submitted",
@@ -147,5 +158,6 @@ def submit_answers(
         "total": total_questions,
         "accuracy": accuracy,
         "time_taken": time_taken,
-        "badge_awarded": badge_name
+        "badge_awarded": badge_name,
+        "overall_badges_awarded": overall_badges
     }
@@ -0,0 +1,33 @@
+# backend/tests/conftest.py
+
+import os
+import sys
+
+# Modules are imported the way the app imports them, relative to backend/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+
+@pytest.fixture
+def mock_llm(monkeypatch):
+    """
+    Route llm_client through an httpx.MockTransport. Call the returned
+    function with a handler (httpx.Request -> httpx.Response); backoff
+    sleeps are disabled so retries run instantly.
+    """
+    import httpx
+    import llm_client
+
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF_BASE_SECONDS", 0)
+    monkeypatch.setattr(llm_client, "LLM_BACKOFF_MAX_SECONDS", 0)
+
+    def install(handler):
+        monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    return install
+
+
+def completion(content: str) -> dict:
+    """A minimal chat-completions response body."""
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
@@ -0,0 +1,136 @@
+# backend/tests/test_generation.py
+#
+# Map-reduce question generation with the chat-completions call stubbed,
+# both as a plain callable and behind llm_client's HTTP boundary.
+# Run from backend/:  python -m pytest tests
+
+import asyncio
+import json
+import re
+
+import httpx
+
+import llm_client
+from ai_code.generation import CHUNK_TOKENS, CHARS_PER_TOKEN, MAX_CHUNKS, chunk_text, generate_questions, select_chunks
+from conftest import completion
+
+PAGE_COUNT = 400
+MARKER = re.compile(r"\bpage(\d+)\b")
+
+
+def make_document(pages: int = PAGE_COUNT) -> str:
+    filler = "mitochondria produce energy for the cell " * 30
+    return " ".join(f"page{i} {filler}" for i in range(pages))
+
+
+def fake_reply(prompt: str) -> str:
+    """
+    Questions that name the first page marker in the prompt's section,
+    plus a duplicate and a malformed item.
+    """
+    page = int(MARKER.search(prompt).group(1))
+    count = int(re.search(r"generate (\d+) multiple-choice", prompt).group(1))
+    questions = [
+        {"question": f"Q{n} about page{page}?", "options": ["a", "b", "c", "d"], "correct_option": n % 4}
+        for n in range(count)
+    ]
+    questions.append({"question": "Duplicate question?", "options": ["a", "b", "c", "d"], "correct_option": 0})
+    questions.append({"question": "Malformed", "options": ["a"], "correct_option": 9})
+    return "Here you go:\n" + json.dumps(questions)
+
+
+def fake_completer(calls: list, fail_on: set = frozenset()):
+    """
+    Stand-in for llm_client.chat.
+    """
+    async def complete(prompt: str) -> str:
+        page = int(MARKER.search(prompt).group(1))
+        calls.append(page)
+        if page in fail_on:
+            raise RuntimeError("LLM unavailable")
+        return fake_reply(prompt)
+
+    return complete
+
+
+def test_chunk_text_respects_size():
+    chunks = chunk_text(make_document())
+    assert len(chunks) > MAX_CHUNKS
+    assert all(len(c) <= CHUNK_TOKENS * CHARS_PER_TOKEN for c in chunks)
+    assert " ".join(chunks) == " ".join(make_document().split())
+
+
+def test_select_chunks_spans_whole_document():
+    chunks = [str(i) for i in range(100)]
+    picked = [int(c) for c in select_chunks(chunks, num_questions=20, max_chunks=8)]
+    assert len(picked) == 8
+    assert picked == sorted(picked)
+    assert picked[0] < 100 / 8 and picked[-1] >= 100 - 100 / 8
+
+
+def test_select_chunks_never_exceeds_questions():
+    assert len(select_chunks([str(i) for i in range(50)], num_questions=3)) == 3
+    assert select_chunks(["only"], num_questions=10) == ["only"]
+
+
+def test_generate_questions_maps_over_whole_document_and_merges():
+    calls = []
+    questions = asyncio.run(generate_questions(make_document(), 20, "medium", fake_completer(calls)))
+
+    assert len(calls) == MAX_CHUNKS
+    assert max(calls) >= PAGE_COUNT * (MAX_CHUNKS - 1) / MAX_CHUNKS  # last section comes from the end
+
+    assert len(questions) == 20
+    texts = [q["question"] for q in questions]
+    assert len(set(texts)) == len(texts)
+    assert "Malformed" not in texts
+    # Interleaved merge: the first round holds one question from every section
+    assert {int(MARKER.search(t).group(1)) for t in texts[:MAX_CHUNKS] if MARKER.search(t)} == set(calls)
+
+
+def test_generate_questions_drops_failed_sections():
+    calls = []
+    first_pass = []
+    asyncio.run(generate_questions(make_document(), 10, "easy", fake_completer(first_pass)))
+
+    failing = set(first_pass[:2])
+    questions = asyncio.run(generate_questions(make_document(), 10, "easy", fake_completer(calls, failing)))
+    assert len(questions) == 10
+    assert not any(f"page{p}?" in q["question"] for q in questions for p in failing)
+
+
+def test_generate_questions_through_llm_client(mock_llm):
+    """
+    Sections whose endpoint keeps failing, answers without JSON or answers
+    with broken JSON are dropped; a transient 503 is retried.
+    """
+    document = make_document()
+    pages = [int(MARKER.search(s).group(1)) for s in select_chunks(chunk_text(document), 20)]
+    failing, no_json, broken_json, flaky = pages[:4]
+    calls = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        prompt = json.loads(request.content)["messages"][0]["content"]
+        page = int(MARKER.search(prompt).group(1))
+        calls[page] = calls.get(page, 0) + 1
+        if page == failing:
+            return httpx.Response(500)
+        if page == no_json:
+            return httpx.Response(200, json=completion("Sorry, I cannot help with that."))
+        if page == broken_json:
+            return httpx.Response(200, json=completion('[{"question": "cut off'))
+        if page == flaky and calls[page] == 1:
+            return httpx.Response(503)
+        return httpx.Response(200, json=completion(fake_reply(prompt)))
+
+    mock_llm(handler)
+    questions = asyncio.run(generate_questions(document, 20, "medium", llm_client.chat))
+
+    assert sorted(calls) == sorted(pages)
+    assert calls[failing] == llm_client.LLM_MAX_RETRIES + 1
+    assert calls[flaky] == 2
+
+    texts = [q["question"] for q in questions]
+    assert len(texts) == 20 and len(set(texts)) == len(texts)
+    answered = {int(m.group(1)) for t in texts if (m := MARKER.search(t))}
+    assert answered == set(pages[3:])
@@ -0,0 +1,100 @@
+# backend/tests/test_llm_client.py
+#
+# llm_client against a stubbed chat-completions endpoint (httpx.MockTransport).
+# Run from backend/:  python -m pytest tests
+
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import llm_client
+from conftest import completion
+from llm_client import LLMError, chat, parse_completion
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_chat_sends_prompt_and_returns_content(mock_llm):
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(json.loads(request.content))
+        return httpx.Response(200, json=completion("hello"))
+
+    mock_llm(handler)
+    assert run(chat("What is ATP?")) == "hello"
+    assert seen == [{"model": llm_client.LLM_MODEL, "messages": [{"role": "user", "content": "What is ATP?"}]}]
+
+
+def test_chat_retries_retryable_statuses(mock_llm):
+    replies = [httpx.Response(503), httpx.Response(429, headers={"Retry-After": "1"}),
+               httpx.Response(200, json=completion("ok"))]
+    mock_llm(lambda request: replies.pop(0))
+
+    assert run(chat("q")) == "ok"
+    assert not replies
+
+
+def test_chat_gives_up_after_max_retries(mock_llm):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(502)
+
+    mock_llm(handler)
+    with pytest.raises(LLMError, match="HTTP 502"):
+        run(chat("q"))
+    assert len(calls) == llm_client.LLM_MAX_RETRIES + 1
+
+
+def test_chat_does_not_retry_client_errors(mock_llm):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(401, json={"error": "bad key"})
+
+    mock_llm(handler)
+    with pytest.raises(LLMError, match="HTTP 401"):
+        run(chat("q"))
+    assert len(calls) == 1
+
+
+def test_chat_retries_transport_errors(mock_llm):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(200, json=completion("ok"))
+
+    mock_llm(handler)
+    assert run(chat("q")) == "ok"
+    assert len(calls) == 2
+
+
+def test_chat_rejects_invalid_json_body(mock_llm):
+    mock_llm(lambda request: httpx.Response(200, content=b"<html>gateway</html>"))
+    with pytest.raises(LLMError, match="invalid JSON"):
+        run(chat("q"))
+
+
+def test_chat_rejects_error_payload(mock_llm):
+    mock_llm(lambda request: httpx.Response(200, json={"error": {"message": "model overloaded"}}))
+    with pytest.raises(LLMError, match="model overloaded"):
+        run(chat("q"))
+
+
+def test_parse_completion():
+    assert parse_completion(completion("text")) == "text"
+    with pytest.raises(LLMError, match="Missing 'choices'"):
+        parse_completion({})
+    for malformed in ({"choices": []}, {"choices": [{}]}, {"choices": None}):
+        with pytest.raises(LLMError, match="Malformed 'choices'"):
+            parse_completion(malformed)
@@ -0,0 +1,51 @@
+# backend/tests/test_password_pool.py
+#
+# The bcrypt process pool recovers when a worker dies.
+# Run from backend/:  python -m pytest tests
+
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+import password_pool
+from utils import verify_password
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    password_pool.shutdown_executor()
+    yield
+    password_pool.shutdown_executor()
+
+
+def kill_worker():
+    """Break the current pool the way an OOM-killed worker would."""
+    async def scenario():
+        with pytest.raises(BrokenProcessPool):
+            await asyncio.get_running_loop().run_in_executor(password_pool.get_executor(), os._exit, 1)
+
+    asyncio.run(scenario())
+
+
+def test_hashing_recovers_after_worker_dies():
+    kill_worker()
+    restarts = password_pool.pool_counters["restarts"]
+
+    hashed = asyncio.run(password_pool.hash_password_async("correct horse"))
+    assert verify_password("correct horse", hashed)
+    assert password_pool.pool_counters["restarts"] == restarts + 1
+
+    valid, _ = asyncio.run(password_pool.verify_password_async("correct horse", hashed))
+    assert valid
+    assert password_pool.pool_counters["restarts"] == restarts + 1
+
+
+def test_pool_that_keeps_breaking_is_reported_busy():
+    restarts = password_pool.pool_counters["restarts"]
+
+    with pytest.raises(password_pool.PasswordPoolBusy):
+        asyncio.run(password_pool._run(os._exit, 1))
+    assert password_pool.pool_counters["restarts"] == restarts + 2
+    assert password_pool.pool_stats()["in_flight"] == 0
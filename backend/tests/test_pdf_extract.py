@@ -0,0 +1,40 @@
+# backend/tests/test_pdf_extract.py
+#
+# The extraction process pool recovers after a worker crashes.
+# Run from backend/:  python -m pytest tests
+
+import asyncio
+import os
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from ai_code import pdf_extract
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    pdf_extract.shutdown_executor()
+    yield
+    pdf_extract.shutdown_executor()
+
+
+def crash_worker(path: str) -> int:
+    """Stands in for a PDF that takes PyMuPDF (and its worker) down."""
+    os._exit(1)
+
+
+def test_crashed_worker_does_not_break_later_uploads(monkeypatch):
+    monkeypatch.setattr(pdf_extract, "_page_count", crash_worker)
+    broken = pdf_extract.get_executor()
+    with pytest.raises(BrokenProcessPool):
+        asyncio.run(pdf_extract.extract_text("malformed.pdf"))
+    monkeypatch.undo()
+
+    executor = pdf_extract.get_executor()
+    assert executor is not broken
+
+    async def still_works():
+        return await asyncio.get_running_loop().run_in_executor(executor, abs, -3)
+
+    assert asyncio.run(still_works()) == 3